@@ -0,0 +1,132 @@
+import asyncio
+import json
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from listing import extract_cards_html
+from telemetry import METRICS
+
+# Request parameters that usually carry the page number of a load-more endpoint, most specific first
+PAGE_PARAM_NAMES = ("page", "paged", "page_next", "pg", "p")
+SKIPPED_HEADERS = ("content-length", "host", ":authority", ":method", ":path", ":scheme")
+
+
+class PagedRequest:
+    """A captured load-more request that can be replayed for any page number."""
+
+    def __init__(self, method, url, body, headers, location, param, first_page):
+        self.method = method
+        self.url = url
+        self.body = body
+        self.headers = headers
+        self.location = location  # "query" or "body"
+        self.param = param
+        self.first_page = first_page
+
+    def for_page(self, number):
+        """Return (url, body) for page `number`."""
+        if self.location == "query":
+            parts = urlsplit(self.url)
+            query = [(k, str(number) if k == self.param else v) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+            return urlunsplit(parts._replace(query=urlencode(query))), self.body
+        body = [(k, str(number) if k == self.param else v) for k, v in parse_qsl(self.body, keep_blank_values=True)]
+        return self.url, urlencode(body)
+
+
+def find_page_param(params):
+    """Name of the parameter holding the page number, or None. Matches bracketed keys like data[page]."""
+    numeric = {k: v for k, v in params if v.isdigit()}
+    for name in PAGE_PARAM_NAMES:
+        for key in numeric:
+            if re.fullmatch(rf"(.*\[)?{name}\]?", key, re.IGNORECASE):
+                return key
+    return None
+
+
+async def discover_paged_request(page, button_selector, timeout=10000):
+    """Click the load-more button once and capture the XHR behind it as a PagedRequest."""
+    button = await page.query_selector(button_selector)
+    if not button:
+        return None
+    try:
+        async with page.expect_request(lambda r: r.resource_type in ("xhr", "fetch"), timeout=timeout) as info:
+            await button.click()
+        request = await info.value
+    except PlaywrightTimeoutError:
+        return None
+
+    headers = {k: v for k, v in (await request.all_headers()).items() if k.lower() not in SKIPPED_HEADERS}
+    body = request.post_data or ""
+    for location, params in (("query", parse_qsl(urlsplit(request.url).query)), ("body", parse_qsl(body))):
+        param = find_page_param(params)
+        if param:
+            first_page = int(dict(params)[param])
+            print(f"Found paged load-more endpoint {request.method} {request.url} ({location} {param}={first_page})")
+            return PagedRequest(request.method, request.url, body, headers, location, param, first_page)
+    print(f"Load-more request {request.method} {request.url} has no page parameter")
+    return None
+
+
+def fragment_html(text):
+    """Load-more endpoints answer with HTML or with JSON wrapping an HTML fragment."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return text
+    fragments = []
+
+    def collect(value):
+        if isinstance(value, str) and "<" in value:
+            fragments.append(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+
+    collect(data)
+    return "".join(fragments)
+
+
+async def fetch_page_text(session, paged_request, url, body, cache):
+    with METRICS.time("listing"):
+        if cache:
+            return await cache.fetch(session, url, "listing", paged_request.method, body, paged_request.headers)
+        async with session.request(paged_request.method, url, data=body or None,
+                                   headers=paged_request.headers) as response:
+            response.raise_for_status()
+            METRICS.count("bytes", len(await response.read()))
+            return await response.text()
+
+
+async def fetch_page_cards(session, paged_request, number, schema, base_selector, budget, cache=None):
+    url, body = paged_request.for_page(number)
+    if cache and cache.serves(url, "listing", paged_request.method, body):
+        text = await fetch_page_text(session, paged_request, url, body, cache)
+    else:
+        text = await budget.call(url, lambda: fetch_page_text(session, paged_request, url, body, cache))
+    with METRICS.time("extract"):
+        return extract_cards_html(fragment_html(text), schema, base_selector)
+
+
+async def iter_paged_cards(session, paged_request, pages, schema, budget, concurrency, base_selector=None,
+                           cache=None):
+    """Fetch `pages` load-more pages `concurrency` at a time, yielding each page's cards in order.
+
+    Stops after the first window that contains an empty or failed page.
+    """
+    first = paged_request.first_page
+    for start in range(first, first + pages, concurrency):
+        numbers = range(start, min(start + concurrency, first + pages))
+        results = await asyncio.gather(
+            *(fetch_page_cards(session, paged_request, n, schema, base_selector, budget, cache) for n in numbers),
+            return_exceptions=True,
+        )
+        for number, cards in zip(numbers, results):
+            if isinstance(cards, Exception):
+                print(f"Load-more page {number} failed: {str(cards)}")
+                return
+            if not cards:
+                return
+            yield number, cards
@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from content_fetch import DEFAULT_CONCURRENCY
+from engine import crawl_sites
+from fixture_server import DEFAULT_PAGES, PROFILES, start_server
+from governor import tree_rss_mb
+from sites import GLOBAL_VOICES, KBC_SPORT, KENYANS
+from telemetry import METRICS
+
+RESULTS_DIR = "bench_results"
+RSS_SAMPLE_EVERY = 0.25  # Seconds between memory samples of a running scenario
+
+
+def scenario_sites(base, pages):
+    """Benchmark scenarios: the real site definitions pointed at the fixture server."""
+    globalvoices = {**GLOBAL_VOICES, "page_url": f"{base}/globalvoices/page/{{page}}/", "base_url": base,
+                    "first_page": 1, "max_pages": pages}
+    kbc = {**KBC_SPORT, "start_url": f"{base}/kbc/category/s/", "base_url": base, "max_clicks": pages - 1}
+    return {
+        "globalvoices": globalvoices,
+        "globalvoices_browser": {**globalvoices, "js_only": True},
+        "kenyans": {**KENYANS, "page_url": f"{base}/kenyans/news?page={{page}}", "base_url": base,
+                    "max_pages": pages},
+        "kbc_direct": kbc,
+        "kbc_click": {**kbc, "direct": False},
+    }
+
+
+class PeakRss:
+    """Sample the memory of this process and its descendants (Chromium's browser, renderer and GPU
+    processes included) on a background thread, keeping the peak. None where it can't be read.
+    """
+
+    def __init__(self, every=RSS_SAMPLE_EVERY):
+        self.every = every
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            rss = tree_rss_mb(os.getpid())
+            if rss is not None:
+                self.peak = max(self.peak or 0.0, rss)
+            if self._stop.wait(self.every):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_scenario(name, site, concurrency, host_delay):
+    """Crawl one scenario end to end. Runs in a fresh process, so its RSS and CPU are its own."""
+    workdir = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    site = {**site, "name": name, "output": os.path.join(workdir, f"{name}.csv"),
+            "frontier": os.path.join(workdir, f"{name}_frontier.sqlite3")}
+    start = time.perf_counter()
+    with PeakRss() as rss:
+        result = asyncio.run(crawl_sites([site], concurrency, cache_dir=None, headline_index=None, search_path=None,
+                                         host_delay=host_delay, browser_endpoint=None, state_dir=None))[name]
+    seconds = time.perf_counter() - start
+    if isinstance(result, Exception):
+        raise result
+
+    # Article latency: the HTTP fetch, or the page load for scenarios that always use the browser
+    stage = METRICS.histograms.get(("goto" if site.get("js_only") else "fetch", name))
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)  # CPU of Chromium, reaped when the browser closed
+    articles = METRICS.counters.get(("articles", name, ""), 0)
+    first = METRICS.histograms.get(("first_article", name))
+    return {
+        "articles": articles,
+        "saved": result,
+        "seconds": round(seconds, 3),
+        "articles_per_second": round(articles / seconds, 2),
+        "first_article_seconds": round(first.total, 3) if first else None,
+        "latency_p50_ms": round(stage.percentile(0.5) * 1000, 1) if stage else None,
+        "latency_p99_ms": round(stage.percentile(0.99) * 1000, 1) if stage else None,
+        # Without /proc or psutil, only this process's own peak (ru_maxrss is in KB on Linux)
+        "peak_rss_mb": round(rss.peak if rss.peak is not None else usage.ru_maxrss / 1024, 1),
+        "cpu_seconds": round(usage.ru_utime + usage.ru_stime + children.ru_utime + children.ru_stime, 2),
+        "bytes": METRICS.counters.get(("bytes", name, ""), 0),
+        "failures": sum(value for (counter, site_name, _), value in METRICS.counters.items()
+                        if counter == "failures" and site_name == name),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_background(port, pages, profile):
+    """Run the fixture server on its own event loop thread, outside the measured processes."""
+    loop = asyncio.new_event_loop()
+    runner = loop.run_until_complete(start_server(port, pages, profile))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+    return stop
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(names=None, pages=DEFAULT_PAGES, profile="lan", concurrency=DEFAULT_CONCURRENCY,
+                   host_delay=0.0, output_dir=RESULTS_DIR):
+    """Run every scenario (or just `names`) against a local fixture server and write a results file."""
+    port = free_port()
+    stop = serve_in_background(port, pages, profile)
+    sites = scenario_sites(f"http://127.0.0.1:{port}", pages)
+    results = {}
+    try:
+        for name in names or sites:
+            print(f"Running {name} ({pages} pages, {profile} latency)")
+            # A fresh process per scenario, so peak RSS doesn't carry over
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                try:
+                    results[name] = pool.submit(run_scenario, name, sites[name], concurrency, host_delay).result()
+                except Exception as e:
+                    print(f"[{name}] Scenario failed: {str(e)}")
+                    results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"[{name}] {json.dumps(results[name])}")
+    finally:
+        stop()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "pages": pages,
+        "profile": profile,
+        "concurrency": concurrency,
+        "host_delay": host_delay,
+        "scenarios": results,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Saved benchmark results to {path}")
+    return path
+
+
+COMPARED = ("articles_per_second", "first_article_seconds", "latency_p50_ms", "latency_p99_ms", "peak_rss_mb",
+            "cpu_seconds")
+
+
+def compare(old_path, new_path):
+    """Print each scenario's metrics from two results files side by side, with the change."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']}")
+    for name, after in new["scenarios"].items():
+        before = old["scenarios"].get(name, {})
+        print(name)
+        for metric in COMPARED:
+            a, b = before.get(metric), after.get(metric)
+            change = f"{(b - a) / a * 100:+.1f}%" if a and b is not None else ""
+            print(f"  {metric:<20} {a!s:>10} {b!s:>10} {change:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against local fixture sites")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the scenarios and save the results")
+    run_parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all)")
+    run_parser.add_argument("--pages", type=int, default=DEFAULT_PAGES, help="listing pages per scenario")
+    run_parser.add_argument("--profile", choices=PROFILES, default="lan", help="simulated latency and jitter")
+    run_parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    run_parser.add_argument("--host-delay", type=float, default=0.0, help="politeness delay (seconds)")
+    run_parser.add_argument("--output-dir", default=RESULTS_DIR)
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        known = scenario_sites("", args.pages)
+        unknown = [name for name in args.scenarios if name not in known]
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(unknown)}")
+        run_benchmarks(args.scenarios, args.pages, args.profile, args.concurrency, args.host_delay, args.output_dir)
+    else:
+        compare(args.old, args.new)
@@ -0,0 +1,137 @@
+import contextlib
+import time
+from urllib.parse import urlparse
+from telemetry import METRICS
+
+# Article pages are only read for their paragraph text
+ARTICLE_BLOCK_TYPES = ("image", "media", "font", "stylesheet", "texttrack", "eventsource", "websocket", "manifest")
+# Listing pages still need their scripts and layout for the load-more buttons
+LISTING_BLOCK_TYPES = ("image", "media", "font")
+DENY_DOMAINS = (
+    "doubleclick.net", "googlesyndication.com", "googletagservices.com", "googletagmanager.com",
+    "google-analytics.com", "adservice.google.com", "facebook.net", "facebook.com", "twitter.com",
+    "platform.x.com", "youtube.com", "ytimg.com", "scorecardresearch.com", "chartbeat.com",
+    "chartbeat.net", "hotjar.com", "taboola.com", "outbrain.com", "quantserve.com", "amazon-adsystem.com",
+    "disqus.com", "onesignal.com",
+)
+SAMPLE_EVERY = 25  # Every Nth measured page load is left unblocked, as a baseline for the savings
+
+
+def matches(host, domains):
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class ResourceBlocker:
+    """Abort requests a page load doesn't need: resource types in `block_types`, hosts in `deny`,
+    and, with `block_third_party`, any host outside the site's own domain and `allow`.
+
+    Page loads wrapped in measure() are timed and their response bytes counted; one in
+    `sample_every` runs unblocked, so report() can estimate the bytes and time blocking saves.
+    """
+
+    def __init__(self, first_party, block_types=ARTICLE_BLOCK_TYPES, deny=DENY_DOMAINS, allow=(),
+                 block_third_party=True, sample_every=SAMPLE_EVERY, label=""):
+        self.first_party = first_party
+        self.label = label  # Site name for the bytes metric; response events run outside the crawl's tasks
+        self.block_types = set(block_types)
+        self.deny = tuple(deny)
+        self.allow = (first_party, *allow)
+        self.block_third_party = block_third_party
+        self.sample_every = sample_every
+        self.blocked = {}  # Resource type -> aborted requests
+        self.loads = {"blocked": [0, 0, 0.0], "baseline": [0, 0, 0.0]}  # Page loads, bytes, seconds
+        self._measured = 0
+        self._unblocked_pages = set()
+        self._page_bytes = {}
+
+    @classmethod
+    def for_site(cls, site, listing=False):
+        """The blocker for a site's article pages, or with `listing` for its listing pages."""
+        default_types = LISTING_BLOCK_TYPES if listing else ARTICLE_BLOCK_TYPES
+        return cls(
+            urlparse(site["base_url"]).hostname.removeprefix("www."),
+            block_types=site.get("block_types", default_types),
+            deny=(*DENY_DOMAINS, *site.get("deny_domains", ())),
+            allow=site.get("allow_domains", ()),
+            block_third_party=not listing,  # Listing pages may load their scripts from CDNs
+            label=site["name"],
+        )
+
+    def should_block(self, request):
+        if request.resource_type == "document" and self._is_main_frame(request):
+            return False
+        host = urlparse(request.url).hostname or ""
+        if request.resource_type in self.block_types or matches(host, self.deny):
+            return True
+        return self.block_third_party and not matches(host, self.allow)
+
+    async def install(self, context):
+        async def handle(route):
+            request = route.request
+            if self.should_block(request) and not self._on_unblocked_page(request):
+                self.blocked[request.resource_type] = self.blocked.get(request.resource_type, 0) + 1
+                await route.abort("blockedbyclient")
+            else:
+                await route.fallback()  # On to the response cache's route, if there is one
+
+        context.on("requestfinished", self._count_bytes)
+        await context.route("**/*", handle)
+
+    def _is_main_frame(self, request):
+        try:
+            return request.frame.parent_frame is None
+        except Exception:
+            return False
+
+    def _page_of(self, message):
+        try:
+            return message.frame.page
+        except Exception:  # Service worker requests have no frame
+            return None
+
+    def _on_unblocked_page(self, request):
+        return self._page_of(request) in self._unblocked_pages
+
+    async def _count_bytes(self, request):
+        # Bytes received, chunked and compressed responses included, which content-length misses
+        page = self._page_of(request)
+        try:
+            size = (await request.sizes())["responseBodySize"]
+        except Exception:  # The page or context closed first
+            return
+        METRICS.count("bytes", size, site=self.label)
+        if page in self._page_bytes:
+            self._page_bytes[page] += size
+
+    @contextlib.asynccontextmanager
+    async def measure(self, page):
+        """Time one page load on `page` and count its bytes; every `sample_every`th runs unblocked."""
+        kind = "baseline" if self.sample_every and self._measured % self.sample_every == 0 else "blocked"
+        self._measured += 1
+        if kind == "baseline":
+            self._unblocked_pages.add(page)
+        self._page_bytes[page] = 0
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            stats = self.loads[kind]
+            stats[0] += 1
+            stats[1] += self._page_bytes.pop(page, 0)
+            stats[2] += time.monotonic() - start
+            self._unblocked_pages.discard(page)
+
+    def report(self, label):
+        loads, size, seconds = self.loads["blocked"]
+        base_loads, base_size, base_seconds = self.loads["baseline"]
+        if not loads:
+            return
+        blocked = ", ".join(f"{count} {kind}" for kind, count in sorted(self.blocked.items())) or "nothing"
+        print(f"{label}: blocked {blocked}; {loads} blocked page loads averaged "
+              f"{size / loads / 1024:.0f}KB in {seconds / loads:.2f}s")
+        if base_loads:
+            # Clamped: with few baseline loads, noise can make the blocked ones look slower
+            saved_size = max(0.0, (base_size / base_loads - size / loads) * loads)
+            saved_seconds = max(0.0, (base_seconds / base_loads - seconds / loads) * loads)
+            print(f"{label}: saved about {saved_size / 1024 / 1024:.1f}MB and {saved_seconds:.0f}s of page loads "
+                  f"against {base_loads} unblocked baseline loads")
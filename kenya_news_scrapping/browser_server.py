@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import aiohttp
+from playwright.async_api import async_playwright
+from governor import tree_rss_mb
+
+DEFAULT_PORT = 9222
+DEFAULT_STATE_DIR = "browser_state"
+DEFAULT_USER_DATA_DIR = "browser_profile"
+MAX_RSS_MB = 1500  # Restart the browser once its processes use this much memory...
+CHECK_EVERY = 30  # ...checked this often (seconds)
+# Endpoint of a running browser server (e.g. http://127.0.0.1:9222) for scrapers to connect to,
+# so cron jobs can share one without passing it to every script
+DEFAULT_ENDPOINT = os.environ.get("SCRAPER_BROWSER")
+
+
+def state_path(state_dir, site):
+    """Where a site's cookies and local storage are kept between runs, or None without a `state_dir`."""
+    return os.path.join(state_dir, f"{site['name'].split('#')[0]}.json") if state_dir else None
+
+
+async def new_site_context(browser, site, state_dir=None, **options):
+    """A context with the site's headers and its saved storage state, if there is one."""
+    path = state_path(state_dir, site)
+    if path and os.path.exists(path):
+        options["storage_state"] = path
+    return await browser.new_context(extra_http_headers=site.get("headers") or {}, **options)
+
+
+async def save_state(context, site, state_dir):
+    """Save a context's cookies and local storage for the site's next run."""
+    path = state_path(state_dir, site)
+    if not path:
+        return
+    os.makedirs(state_dir, exist_ok=True)
+    state = await context.storage_state()
+    part = f"{path}.{os.getpid()}.part"  # Shards and categories listed in parallel share the file
+    with open(part, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(part, path)
+
+
+async def connect_or_launch(playwright, endpoint=DEFAULT_ENDPOINT):
+    """Connect to the browser server at `endpoint`, or launch a browser of our own if there is none."""
+    if endpoint:
+        try:
+            browser = await playwright.chromium.connect_over_cdp(endpoint, timeout=10000)
+            print(f"Connected to the browser at {endpoint}")
+            return browser
+        except Exception as e:
+            print(f"Browser server at {endpoint} unavailable, launching a browser: {str(e)}")
+    return await playwright.chromium.launch(headless=True)
+
+
+async def browser_pid(browser):
+    """Process id of the browser's main process, or None if it won't say (e.g. not Chromium)."""
+    try:
+        cdp = await browser.new_browser_cdp_session()
+        try:
+            info = await cdp.send("SystemInfo.getProcessInfo")
+        finally:
+            await cdp.detach()
+    except Exception:
+        return None
+    return next((process["id"] for process in info.get("processInfo", []) if process.get("type") == "browser"), None)
+
+
+async def check(session, port):
+    """(responding, pages open by scrapers) for the browser's DevTools endpoint."""
+    try:
+        async with session.get(f"http://127.0.0.1:{port}/json/list") as response:
+            targets = await response.json()
+        pages = [target for target in targets if target.get("type") == "page" and target.get("url") != "about:blank"]
+        return True, len(pages)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return False, 0
+
+
+def launch(executable, port, user_data_dir):
+    # The profile directory keeps the browser's own disk cache warm across restarts
+    return subprocess.Popen([
+        executable, "--headless=new", f"--remote-debugging-port={port}", "--remote-debugging-address=127.0.0.1",
+        f"--user-data-dir={os.path.abspath(user_data_dir)}", "--no-first-run", "--no-default-browser-check",
+        "--disable-background-networking", "about:blank",
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def serve(port=DEFAULT_PORT, max_rss_mb=MAX_RSS_MB, check_every=CHECK_EVERY,
+                user_data_dir=DEFAULT_USER_DATA_DIR):
+    """Keep one Chromium running for scrapers to connect to over CDP, restarting it when it dies,
+    stops answering, or leaks past `max_rss_mb` (waiting until no pages are open for that one).
+    """
+    async with async_playwright() as p:
+        executable = p.chromium.executable_path
+    process = launch(executable, port, user_data_dir)
+    print(f"Browser server listening on http://127.0.0.1:{port} (pid {process.pid})")
+    failed_checks = 0
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+        try:
+            while True:
+                await asyncio.sleep(check_every)
+                responding, pages = await check(session, port)
+                failed_checks = 0 if responding else failed_checks + 1
+                rss = tree_rss_mb(process.pid)
+                if process.poll() is not None:
+                    reason = f"exited with {process.returncode}"
+                elif failed_checks >= 2:
+                    reason = "stopped responding"
+                elif rss is not None and rss > max_rss_mb and not pages:
+                    reason = f"uses {rss:.0f}MB"
+                else:
+                    continue
+                print(f"Restarting the browser: it {reason}")
+                stop(process)
+                process = launch(executable, port, user_data_dir)
+                failed_checks = 0
+        finally:
+            stop(process)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a long-lived Chromium for the scrapers to share")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-rss-mb", type=int, default=MAX_RSS_MB, help="restart the browser above this memory use")
+    parser.add_argument("--check-every", type=float, default=CHECK_EVERY, help="seconds between health checks")
+    parser.add_argument("--user-data-dir", default=DEFAULT_USER_DATA_DIR)
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.max_rss_mb, args.check_every, args.user_data_dir))
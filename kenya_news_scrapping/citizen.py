@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import re
+from urllib.parse import urljoin
+from crawl4ai import AsyncWebCrawler, BrowserConfig, CacheMode, CrawlerRunConfig
+from crawl4ai.async_dispatcher import MemoryAdaptiveDispatcher
+from frontier import Frontier
+from governor import BROWSERS, PAGES
+from http_fetch import parse_text
+from listing import extract_cards_html
+from sinks import open_sink
+from sites import CITIZEN
+from telemetry import METRICS, current_site
+
+CHECKPOINT_EVERY = 50
+MEMORY_THRESHOLD = 70.0  # Percent of system memory above which the dispatcher stops starting crawls
+MAX_SESSIONS = 8  # Pages crawled at once while memory allows
+
+
+def article_links(result, site):
+    """(url, link text) of every article linked from a crawled section page."""
+    pattern = re.compile(site["article_pattern"])
+    links = {}
+    for link in result.links.get("internal", []):
+        url = urljoin(site["base_url"], link.get("href", "")).split("#")[0]
+        if pattern.match(url):
+            links.setdefault(url, (link.get("text") or "").strip())
+    return links.items()
+
+
+def article_record(result, site, listed):
+    """The listed record, completed from the article page's metadata and paragraphs."""
+    record = dict(listed)
+    for field, value in (extract_cards_html(result.html, site["article"]) or [{}])[0].items():
+        if value:
+            record[field] = value.strip()
+    record[site["content_field"]] = parse_text(result.html, site["content_selector"])
+    return record
+
+
+async def crawl_citizen(site=CITIZEN, max_sessions=MAX_SESSIONS, memory_threshold=MEMORY_THRESHOLD, refresh=False):
+    """Crawl every section page, then every new article they link to, in one crawl4ai session.
+
+    Both passes go through arun_many with a memory-adaptive dispatcher and stream their results,
+    so records reach the frontier as each page finishes. Article pages come from crawl4ai's cache
+    when it has them (`refresh` re-fetches them); section pages are always fetched fresh.
+    Returns the number of articles in the output.
+    """
+    name = site["name"]
+    current_site.set(name)
+    frontier = Frontier(site.get("frontier", f"{name}_frontier.sqlite3"))
+    if site["output"].endswith(".csv"):
+        frontier.seed_from_csv(site["output"])
+
+    browser_config = BrowserConfig(headless=True, headers=site.get("headers") or {})
+    # Within the machine-wide browser and page limits shared with the other scrapers
+    async with BROWSERS.slots(), PAGES.slots(max_sessions) as sessions, \
+            AsyncWebCrawler(config=browser_config) as crawler:
+        def dispatcher():
+            return MemoryAdaptiveDispatcher(memory_threshold_percent=memory_threshold, max_session_permit=sessions)
+
+        # Section pages change all the time, so they refresh the cache rather than read it
+        section_config = CrawlerRunConfig(cache_mode=CacheMode.WRITE_ONLY, stream=True)
+        categories = {url: category for category, url in site["sections"].items()}
+        async for result in await crawler.arun_many(list(categories), config=section_config, dispatcher=dispatcher()):
+            if not result.success:
+                METRICS.count("failures", error="CrawlFailed")
+                print(f"[{name}] Crawl failed for {result.url}: {result.error_message}")
+                continue
+            added = 0
+            category = categories.get(result.url, "")
+            for url, headline in article_links(result, site):
+                record = {column: "" for column in site["columns"]}
+                record.update(category=category, headline=headline, url=url)
+                if frontier.add(url, record):
+                    added += 1
+                elif frontier.listed_this_run(url):  # Listed in several sections: keep them all
+                    frontier.add_tag(url, "category", category)
+            frontier.checkpoint()
+            print(f"[{name}] {added} new articles in {result.url}")
+
+        # Articles listed by an interrupted run are fetched along with the new ones
+        listed = {news_item["url"]: news_item for news_item in frontier.pending()}
+        article_config = CrawlerRunConfig(cache_mode=CacheMode.WRITE_ONLY if refresh else CacheMode.ENABLED,
+                                          stream=True)
+        fetched = 0
+        async for result in await crawler.arun_many(list(listed), config=article_config, dispatcher=dispatcher()):
+            if not result.success:
+                METRICS.count("failures", error="CrawlFailed")
+                print(f"[{name}] Crawl failed for {result.url}: {result.error_message}")
+                continue
+            with METRICS.time("extract"):
+                record = article_record(result, site, listed.get(result.url, {"url": result.url}))
+            frontier.mark_fetched(result.url, record, ("category",))
+            METRICS.count("articles")
+            fetched += 1
+            if fetched % CHECKPOINT_EVERY == 0:
+                frontier.checkpoint()
+            print(f"[{name}] Extracted content for {result.url}")
+        frontier.checkpoint()
+
+    with open_sink(site["output"], site["columns"]) as sink, METRICS.time("write"):
+        for record in frontier.records():
+            sink.write(record)
+    frontier.close()
+    if sink.count:
+        print(f"✅ [{name}] Saved {sink.count} articles ({fetched} new) to {site['output']}")
+    else:
+        print(f"[{name}] No data found")
+    return sink.count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl Citizen Digital sections and articles with crawl4ai")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS, help="pages crawled at once")
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD,
+                        help="system memory percent above which no new pages are started")
+    parser.add_argument("--refresh", action="store_true", help="re-fetch articles crawl4ai has cached")
+    parser.add_argument("--output", default=CITIZEN["output"], help="where to write (.csv, .jsonl or .parquet)")
+    args = parser.parse_args()
+    asyncio.run(crawl_citizen({**CITIZEN, "output": args.output}, args.max_sessions, args.memory_threshold,
+                              args.refresh))
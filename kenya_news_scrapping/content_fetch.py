@@ -0,0 +1,236 @@
+import asyncio
+import contextlib
+import email.utils
+import time
+from urllib.parse import urlparse
+import aiohttp
+from governor import PAGES
+from telemetry import METRICS
+
+DEFAULT_CONCURRENCY = 4  # Pages open at once
+DEFAULT_HOST_DELAY = 1.0  # Starting gap, in seconds, between two requests to the same host
+DEFAULT_ATTEMPTS = 3
+
+RETRY_STATUSES = (429, 503)  # The host is asking us to slow down
+MAX_HOST_RATE = 10.0  # Requests per second a healthy host can grow to
+MIN_HOST_RATE = 0.05
+MAX_HOST_CONCURRENCY = 8  # Requests in flight to one host
+RATE_STEP = 0.1  # Requests per second added after each quick success
+LATENCY_SPIKE = 3.0  # A response this many times slower than the host's average counts as congestion...
+LATENCY_MARGIN = 1.0  # ...if it is also at least this many seconds slower
+LOG_EVERY = 50  # Successes between rate log lines for a host
+
+
+class HostBusy(Exception):
+    """A 429/503 answer to a browser navigation, which Playwright doesn't raise for."""
+
+    def __init__(self, url, status, retry_after=None):
+        super().__init__(f"{url} answered {status}")
+        self.status = status
+        self.headers = {"Retry-After": retry_after} if retry_after else {}
+
+
+def retry_after_seconds(value):
+    """Seconds to wait for a Retry-After header holding either seconds or an HTTP date."""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_congestion(error):
+    """Whether a failed request suggests the host is overloaded: 429/503, 5xx, timeouts, dropped connections."""
+    status = getattr(error, "status", None)
+    if status:
+        return status in RETRY_STATUSES or status >= 500
+    # A dropped keep-alive connection is a ClientError, not an OSError
+    return (isinstance(error, (OSError, asyncio.TimeoutError, aiohttp.ServerDisconnectedError))
+            or type(error).__name__ == "TimeoutError")
+
+
+class HostState:
+    def __init__(self, rate):
+        self.rate = rate
+        self.limit = 2.0
+        self.tokens = 1.0
+        self.refilled = time.monotonic()
+        self.in_flight = 0
+        self.latency = None  # Moving average of successful response times
+        self.blocked_until = 0.0
+        self.decreased_at = float("-inf")  # When the budget was last halved
+        self.successes = 0
+
+    def refill(self, now):
+        if self.rate == float("inf"):
+            self.tokens = 1.0
+        else:
+            self.tokens = min(max(1.0, self.limit), self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+
+
+class HostBudget:
+    """Adaptive per-host politeness shared by every fetch path.
+
+    Each host gets a token bucket that caps its request rate and an in-flight limit that caps its
+    concurrency. Both start at one request per `delay` seconds and two in flight, grow additively
+    while the host answers quickly, and are halved on 429/503, server errors, timeouts or latency
+    spikes (AIMD), at most once per round trip: requests already in flight when the budget was
+    halved don't halve it again. A Retry-After header pauses the host for as long as it asks.
+    """
+
+    def __init__(self, delay=DEFAULT_HOST_DELAY, max_rate=MAX_HOST_RATE, max_concurrency=MAX_HOST_CONCURRENCY):
+        self.initial_rate = 1 / delay if delay else float("inf")
+        # Without a delay the start rate is unbounded, but backing off still needs a finite rate to halve
+        self.max_rate = max_rate if self.initial_rate == float("inf") else max(max_rate, self.initial_rate)
+        self.max_concurrency = max_concurrency
+        self._hosts = {}
+        self._changed = asyncio.Condition()
+
+    def _state(self, host):
+        if host not in self._hosts:
+            self._hosts[host] = HostState(self.initial_rate)
+        return self._hosts[host]
+
+    async def acquire(self, url):
+        """Wait for a request slot on `url`'s host. Returns (host, start time) for release()."""
+        host = urlparse(url).netloc
+        state = self._state(host)
+        async with self._changed:
+            while True:
+                now = time.monotonic()
+                state.refill(now)
+                delay = state.blocked_until - now
+                if delay <= 0 and state.in_flight < max(1, int(state.limit)):
+                    if state.tokens >= 1:
+                        state.tokens -= 1
+                        state.in_flight += 1
+                        return host, now
+                    delay = (1 - state.tokens) / state.rate
+                try:
+                    # Woken early when a release frees a slot or changes the rate
+                    await asyncio.wait_for(self._changed.wait(), delay if delay > 0 else None)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, host, started, error=None):
+        """Feed a finished request back: success grows the host's budget, congestion halves it."""
+        now = time.monotonic()
+        latency = now - started
+        state = self._state(host)
+        async with self._changed:
+            state.in_flight -= 1
+            if error is not None and is_congestion(error):
+                retry_after = retry_after_seconds((getattr(error, "headers", None) or {}).get("Retry-After"))
+                if retry_after:
+                    state.blocked_until = max(state.blocked_until, now + retry_after)
+                self._decrease(host, state, started, f"{type(error).__name__}"
+                               + (f", retrying after {retry_after:.0f}s" if retry_after else ""))
+            elif error is None and state.latency and latency > max(LATENCY_SPIKE * state.latency,
+                                                                   state.latency + LATENCY_MARGIN):
+                self._decrease(host, state, started, f"latency spike {latency:.1f}s vs {state.latency:.1f}s")
+                state.latency = 0.8 * state.latency + 0.2 * latency
+            elif error is None:
+                state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+                state.rate = min(self.max_rate, state.rate + RATE_STEP)
+                state.limit = min(self.max_concurrency, state.limit + 1 / state.limit)
+                state.successes += 1
+                if state.successes % LOG_EVERY == 0:
+                    self.log(host, state, "steady")
+            self._changed.notify_all()
+
+    def _decrease(self, host, state, started, reason):
+        if started < state.decreased_at:  # Sent before the last decrease, which already covers it
+            return
+        state.decreased_at = time.monotonic()
+        if state.rate == float("inf"):
+            state.rate = self.max_rate
+        state.rate = max(MIN_HOST_RATE, state.rate / 2)
+        state.limit = max(1.0, state.limit / 2)
+        METRICS.count("throttled")
+        self.log(host, state, f"backing off: {reason}")
+
+    def log(self, host, state, reason):
+        print(f"[rate] {host}: {state.rate:.2f} req/s, {int(state.limit)} in flight ({reason})")
+
+    @contextlib.asynccontextmanager
+    async def request(self, url):
+        """Hold a request slot on `url`'s host for the duration of the block."""
+        host, started = await self.acquire(url)
+        try:
+            yield
+        except Exception as e:
+            await self.release(host, started, e)
+            raise
+        await self.release(host, started)
+
+    async def call(self, url, fetch, attempts=DEFAULT_ATTEMPTS):
+        """`await fetch()` inside a request slot, retrying congestion failures. The budget itself
+        paces the retries, so there is no fixed sleep between them.
+        """
+        for attempt in range(attempts):
+            try:
+                async with self.request(url):
+                    return await fetch()
+            except Exception as e:
+                if attempt == attempts - 1 or not is_congestion(e):
+                    raise
+                METRICS.count("retries")
+                print(f"Attempt {attempt + 1} failed for {url}: {str(e)}")
+
+
+async def fetch_contents(browser, urls, extract, concurrency=DEFAULT_CONCURRENCY,
+                         host_delay=DEFAULT_HOST_DELAY, headers=None, default="", budget=None, cache=None,
+                         blocker=None, javascript=True, storage_state=None):
+    """Run `extract(page, url)` for every url on a pool of pages.
+
+    Results come back in the same order as `urls`; empty urls get `default`. Pass a shared
+    `budget` to keep the per-host rate across several calls hitting the same hosts, a `cache`
+    (http_cache.ResponseCache) to serve article pages from disk, and a `blocker`
+    (blocking.ResourceBlocker) to skip the images, fonts and trackers extraction doesn't need.
+    `storage_state` starts the pages with a site's saved cookies and local storage.
+    """
+    budget = budget or HostBudget(host_delay)
+    results = [default] * len(urls)
+    pages = asyncio.Queue()
+
+    async def worker(index, url):
+        if not url:
+            return
+        page = await pages.get()
+
+        async def load():
+            if blocker:
+                async with blocker.measure(page):
+                    return await extract(page, url)
+            return await extract(page, url)
+
+        try:
+            if cache and cache.serves(url):
+                results[index] = await load()
+            else:
+                results[index] = await budget.call(url, load)
+        except Exception as e:
+            METRICS.failure(e)
+            print(f"Error crawling {url}: {str(e)}")
+        finally:
+            pages.put_nowait(page)
+
+    # Fewer pages than `concurrency` when other scrapers on the machine hold most of the page slots
+    async with PAGES.slots(max(1, min(concurrency, len(urls)))) as allowed:
+        context = await browser.new_context(extra_http_headers=headers or {}, java_script_enabled=javascript,
+                                            storage_state=storage_state)
+        try:
+            if cache:
+                await cache.install(context, "article")
+            if blocker:
+                await blocker.install(context)  # Routed before the cache, so blocked requests never reach it
+            for _ in range(allowed):
+                pages.put_nowait(await context.new_page())
+            await asyncio.gather(*(worker(i, url) for i, url in enumerate(urls)))
+        finally:
+            await context.close()
+    return results
@@ -0,0 +1,189 @@
+import argparse
+import hashlib
+import os
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+CORPUS_ROOT = "corpus"
+
+# Every source is stored with the same columns; source and date become hive partitions
+# (corpus/source=kbc/date=2025-05-06/part-*.parquet)
+COLUMNS = ["source", "date", "category", "headline", "url", "published_at", "author", "tags", "description", "content"]
+PARTITIONING = ds.partitioning(pa.schema([("source", pa.string()), ("date", pa.string())]), flavor="hive")
+DICTIONARY_COLUMNS = ["category", "author", "tags"]  # Few distinct values, many repeats
+UNKNOWN_DATE = "unknown"
+# Every source and day is a partition, well past pyarrow's default cap of 1024 in one import.
+# Open files stay under the usual ulimit of 1024: pyarrow closes the biggest one rather than failing
+MAX_PARTITIONS = 1_000_000
+MAX_OPEN_FILES = 512
+
+# Existing CSV outputs: file name -> (source, category for files scraped from one KBC section)
+CSV_SOURCES = {
+    "kbc_county_news_with_content.csv": ("kbc", "county"),
+    "kbc_entertainment_news_content.csv": ("kbc", "entertainment"),
+    "kbc_local_news_content.csv": ("kbc", "local-news"),
+    "kbc_news_content.csv": ("kbc", "news"),
+    "kbc_news_with_content.csv": ("kbc", None),
+    "kbc_content.csv": ("kbc", None),  # Every category at once: "categories" lists them all
+    "kbc_sport_content.csv": ("kbc", "sport"),
+    "kbcnews_content.csv": ("kbc", "news"),
+    "kbc_local_news_with_content.csv": ("kbc", "local-news"),
+    "voa_africa_news.csv": ("voa", None),
+    "globalvoices_kenya_articles.csv": ("globalvoices", None),
+    "kenyans_news_content.csv": ("kenyans", None),
+    "citizen_digital.csv": ("citizen", None),
+    "citizen_news.csv": ("citizen", None),
+    "news.csv": ("citizen", None),
+    "newss.csv": ("citizen", None),
+}
+
+RENAMES = {
+    "title": "headline",
+    "Title": "headline",
+    "URL": "url",
+    "date": "published_at",
+    "Date": "published_at",
+    "time": "published_at",
+    "Author": "author",
+    "Tagline": "description",
+    "teaser": "description",
+    "Article Content": "content",
+    "categories": "category",
+}
+SOURCE_RENAMES = {
+    "voa": {"description": "content"},  # voascrape.py stores the article body as "description"
+}
+
+
+def to_corpus_frame(df, source, category=None):
+    """Map a scraper's output columns onto the corpus columns."""
+    df = df.rename(columns={**RENAMES, **SOURCE_RENAMES.get(source, {})})
+    df = df.reindex(columns=COLUMNS).fillna("").astype(str)
+    df["source"] = source
+    if category:
+        df.loc[df["category"] == "", "category"] = category
+    dates = pd.to_datetime(df["published_at"], utc=True, errors="coerce", format="mixed")
+    df["date"] = dates.dt.strftime("%Y-%m-%d").fillna(UNKNOWN_DATE)
+    return df
+
+
+def article_keys(df):
+    """Each row's article key: its URL where there is one, otherwise its headline."""
+    return df["url"].where(df["url"] != "", "headline:" + df["headline"])
+
+
+def dedupe(df):
+    """Keep one row per article: by URL where there is one, otherwise by headline. Longest content wins."""
+    df = df.assign(_key=article_keys(df), _length=df["content"].str.len())
+    df = df.sort_values("_length", ascending=False, kind="stable")
+    df = df.drop_duplicates(["source", "_key"]).sort_index()
+    return df.drop(columns=["_key", "_length"])
+
+
+def drop_stored(df, root=CORPUS_ROOT):
+    """The rows whose articles aren't in the dataset under `root` yet."""
+    if not os.path.isdir(root):
+        return df
+    stored = load_corpus(root, columns=["source", "url", "headline"], sources=df["source"].unique().tolist())
+    if stored.empty:
+        return df
+    stored_keys = set(zip(stored["source"].astype(str), article_keys(stored.fillna(""))))
+    return df[[key not in stored_keys for key in zip(df["source"], article_keys(df))]]
+
+
+def write_corpus(df, root=CORPUS_ROOT):
+    """Append corpus rows to the partitioned dataset under `root`, skipping articles it already has."""
+    df = drop_stored(df, root)
+    if df.empty:
+        return 0
+    table = pa.Table.from_pandas(df[COLUMNS], preserve_index=False)
+    file_options = ds.ParquetFileFormat().make_write_options(compression="zstd", use_dictionary=DICTIONARY_COLUMNS)
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=PARTITIONING,
+        file_options=file_options,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_partitions=MAX_PARTITIONS,
+        max_open_files=MAX_OPEN_FILES,
+    )
+    return len(df)
+
+
+def import_csvs(paths, root=CORPUS_ROOT):
+    """Import existing CSV outputs. Identical files and repeated articles are stored once, so
+    re-running the import only adds articles the corpus doesn't have yet.
+    """
+    frames = []
+    seen_hashes = set()
+    for path in paths:
+        name = os.path.basename(path)
+        if name not in CSV_SOURCES:
+            print(f"Skipping {path}: not a known scraper output")
+            continue
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if digest in seen_hashes:
+            print(f"Skipping {path}: identical to a file already imported")
+            continue
+        seen_hashes.add(digest)
+
+        source, category = CSV_SOURCES[name]
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+        df = to_corpus_frame(df.rename(columns=str.strip), source, category)
+        frames.append(df[(df["url"] != "") | (df["headline"] != "")])
+        print(f"Read {len(df)} rows from {path} as source={source}")
+
+    if not frames:
+        print("No data found")
+        return 0
+    df = dedupe(pd.concat(frames, ignore_index=True))
+    count = write_corpus(df, root)
+    print(f"✅ Imported {count} articles into {root} ({len(df) - count} already there)")
+    return count
+
+
+def load_corpus(root=CORPUS_ROOT, columns=None, sources=None, since=None, until=None, filter=None):
+    """Load corpus rows as a DataFrame, reading only `columns` and the matching partitions.
+
+    `since`/`until` are inclusive YYYY-MM-DD bounds on the partition date; `filter` is any
+    extra pyarrow.dataset expression, e.g. ds.field("category") == "sport".
+    """
+    dataset = ds.dataset(root, format="parquet", partitioning=PARTITIONING)
+    conditions = [filter] if filter is not None else []
+    if sources:
+        conditions.append(ds.field("source").isin(list(sources)))
+    if since:
+        conditions.append((ds.field("date") >= since) & (ds.field("date") != UNKNOWN_DATE))
+    if until:
+        conditions.append(ds.field("date") <= until)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partitioned Parquet store for the scraped corpus")
+    parser.add_argument("--root", default=CORPUS_ROOT)
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="import existing CSV outputs")
+    import_parser.add_argument("paths", nargs="+")
+    query_parser = commands.add_parser("query", help="print matching rows")
+    query_parser.add_argument("--columns", help="comma-separated columns to read")
+    query_parser.add_argument("--source", action="append", dest="sources")
+    query_parser.add_argument("--since")
+    query_parser.add_argument("--until")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        import_csvs(args.paths, args.root)
+    else:
+        columns = args.columns.split(",") if args.columns else None
+        df = load_corpus(args.root, columns, args.sources, args.since, args.until)
+        print(df.to_string(max_rows=50, max_colwidth=60))
+        print(f"{len(df)} rows")
@@ -0,0 +1,159 @@
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import zlib
+import numpy as np
+import pandas as pd
+from frontier import normalize_url
+
+DEFAULT_HEADLINE_INDEX = "headlines.sqlite3"
+NUM_PERM = 128
+BANDS = 16  # 16 bands of 8 rows: pairs above ~0.7 similarity almost always share a bucket
+SHINGLE_WORDS = 5
+THRESHOLD = 0.8
+PRIME = 4294967311  # Just above 2**32, so (a * x + b) % PRIME stays within uint64
+
+HEADLINE_FIELDS = ("headline", "title", "Title")
+DATE_FIELDS = ("published_at", "date", "Date", "time")
+
+_rng = np.random.RandomState(1)  # Fixed, so signatures from different runs are comparable
+PERM_A = _rng.randint(1, 2 ** 31, NUM_PERM).astype(np.uint64)
+PERM_B = _rng.randint(0, 2 ** 31, NUM_PERM).astype(np.uint64)
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Hashes of the overlapping `size`-word windows of `text`, ignoring case and punctuation."""
+    words = re.findall(r"\w+", text.lower())
+    windows = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))} if words else set()
+    return np.array([zlib.crc32(window.encode()) for window in windows], dtype=np.uint64)
+
+
+def minhash(text):
+    """NUM_PERM-value MinHash signature of `text`, or None when it has no words."""
+    hashes = shingles(text)
+    if not len(hashes):
+        return None
+    return ((PERM_A[:, None] * hashes[None, :] + PERM_B[:, None]) % PRIME).min(axis=1)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def article_id(url, headline=""):
+    key = normalize_url(url) if url else f"headline:{headline}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def cluster(texts, threshold=THRESHOLD):
+    """Group near-duplicate texts with MinHash + LSH. Returns a cluster label (a text index) per text.
+
+    Texts only get compared when their signatures share an LSH band, so this stays close to linear
+    in the number of texts instead of comparing every pair.
+    """
+    parents = list(range(len(texts)))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    signatures = [minhash(text) for text in texts]
+    rows = NUM_PERM // BANDS
+    for band in range(BANDS):
+        buckets = {}
+        for index, signature in enumerate(signatures):
+            if signature is not None:
+                buckets.setdefault(signature[band * rows:(band + 1) * rows].tobytes(), []).append(index)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                if find(first) != find(other) and similarity(signatures[first], signatures[other]) >= threshold:
+                    parents[find(other)] = find(first)
+    return [find(i) for i in range(len(texts))]
+
+
+def assign_canonical_ids(df, threshold=THRESHOLD):
+    """Add `article_id`, `canonical_id` and `duplicate` columns to corpus rows.
+
+    Every near-duplicate cluster of `content` shares the canonical id of its longest article;
+    `duplicate` marks all the others.
+    """
+    df = df.reset_index(drop=True)
+    content = df["content"].fillna("").astype(str)
+    ids = [article_id(url, headline) for url, headline in zip(df["url"].fillna(""), df["headline"].fillna(""))]
+    labels = pd.Series(cluster(content.tolist(), threshold))
+    lengths = content.str.len()
+    canonical = lengths.groupby(labels).idxmax()  # Row of the longest article in each cluster
+    df["article_id"] = ids
+    df["canonical_id"] = [ids[canonical[label]] for label in labels]
+    df["duplicate"] = df["article_id"] != df["canonical_id"]
+    return df
+
+
+def headline_key(record):
+    """"headline|YYYY-MM-DD" for a listing record, or None when it lacks a headline or a parsable date."""
+    headline = next((record[f] for f in HEADLINE_FIELDS if record.get(f) and record[f] != "N/A"), None)
+    date = next((record[f] for f in DATE_FIELDS if record.get(f) and record[f] != "N/A"), None)
+    if not headline or not date:
+        return None
+    day = pd.to_datetime(date, utc=True, errors="coerce")
+    if pd.isna(day):
+        return None
+    words = re.findall(r"\w+", headline.lower())
+    return f"{' '.join(words)}|{day.strftime('%Y-%m-%d')}"
+
+
+class HeadlineIndex:
+    """Headline + publication day of every article listed by any site, so a story another source
+    already has can be dropped before paying for its content fetch.
+    """
+
+    def __init__(self, path=DEFAULT_HEADLINE_INDEX):
+        self.db = sqlite3.connect(path, timeout=30)  # Shared by concurrent crawls
+        self.db.execute("CREATE TABLE IF NOT EXISTS headlines (key TEXT PRIMARY KEY, url TEXT NOT NULL)")
+        self.dropped = 0
+
+    def duplicate_of(self, url, record):
+        """URL of an earlier article with the same headline and day, or None (and remember this one)."""
+        key = headline_key(record)
+        if key is None:
+            return None
+        url = normalize_url(url)
+        self.db.execute("INSERT OR IGNORE INTO headlines (key, url) VALUES (?, ?)", (key, url))
+        self.db.commit()
+        canonical = self.db.execute("SELECT url FROM headlines WHERE key = ?", (key,)).fetchone()[0]
+        if canonical == url:
+            return None
+        self.dropped += 1
+        return canonical
+
+    def close(self):
+        self.db.close()
+
+
+if __name__ == "__main__":
+    from corpus import CORPUS_ROOT, load_corpus  # The crawler only needs HeadlineIndex, not pyarrow
+
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate articles and give each cluster one id")
+    parser.add_argument("--root", default=CORPUS_ROOT, help="corpus to read")
+    parser.add_argument("--source", action="append", dest="sources")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="minimum estimated Jaccard similarity")
+    parser.add_argument("--drop", action="store_true", help="keep only the canonical article of each cluster")
+    parser.add_argument("--output", required=True, help="where to write rows with their canonical ids (.csv/.parquet)")
+    args = parser.parse_args()
+
+    df = assign_canonical_ids(load_corpus(args.root, sources=args.sources), args.threshold)
+    duplicates = int(df["duplicate"].sum())
+    print(f"{len(df)} articles, {df['canonical_id'].nunique()} distinct stories, {duplicates} near-duplicates")
+    if args.drop:
+        df = df[~df["duplicate"]]
+    if os.path.splitext(args.output)[1] == ".parquet":
+        df.to_parquet(args.output, index=False)
+    else:
+        df.to_csv(args.output, index=False)
+    print(f"✅ Saved {len(df)} rows to {args.output}")
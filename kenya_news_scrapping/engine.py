@@ -0,0 +1,500 @@
+import argparse
+import asyncio
+import functools
+import os
+import tempfile
+import time
+from urllib.parse import urljoin
+from playwright.async_api import async_playwright
+import nest_asyncio
+from ajax_listing import discover_paged_request, iter_paged_cards
+from blocking import ResourceBlocker
+from browser_server import (DEFAULT_ENDPOINT, DEFAULT_STATE_DIR, browser_pid, connect_or_launch, new_site_context,
+                            save_state, state_path)
+from content_fetch import DEFAULT_CONCURRENCY, DEFAULT_HOST_DELAY, RETRY_STATUSES, HostBudget, HostBusy
+from dedup import DEFAULT_HEADLINE_INDEX, HeadlineIndex
+from frontier import Frontier
+from http_cache import DEFAULT_CACHE_DIR, ResponseCache
+from http_fetch import iter_contents_http_first, new_session
+from governor import BROWSERS, PAGES, RECYCLE_AFTER, PageRecycler
+from listing import extract_cards, extract_new_cards, prune_seen_cards
+from postprocess import COLUMNS as POSTPROCESS_COLUMNS, POSTPROCESS_WORKERS, new_pool, postprocess_batch
+from search import DEFAULT_SEARCH_INDEX, SearchIndex
+from sinks import open_sink
+from sites import DEFAULT_SITES, HEADERS, SITES
+from telemetry import METRICS, current_site, serve_metrics
+from waits import WaitStats, click_and_wait_for_more, goto_with_retry, wait_for_network_idle
+
+nest_asyncio.apply()
+
+CHECKPOINT_EVERY = 50  # Articles fetched between frontier commits
+QUEUE_SIZE = 10  # Listing batches (pages or load-more clicks) waiting for the fetch stage
+
+# One paragraph per line, so post-processing can tell a byline paragraph from the article text
+PARAGRAPHS_JS = "elements => elements.map(el => el.innerText.trim()).filter(Boolean).join('\\n')"
+
+
+async def extract_article_content(page, article_url, selector):
+    """Browser fallback: render the article and join its paragraphs in one round trip."""
+    with METRICS.time("goto"):
+        response = await page.goto(article_url, wait_until="domcontentloaded", timeout=60000)  # 60s timeout
+    if response and response.status in RETRY_STATUSES:
+        raise HostBusy(article_url, response.status, response.headers.get("retry-after"))
+    with METRICS.time("extract"):
+        return await page.eval_on_selector_all(selector, PARAGRAPHS_JS)
+
+
+def add_new_items(site, frontier, cards, page_number=None, headlines=None):
+    """Turn listing cards into output records and queue the ones the frontier hasn't seen.
+
+    Returns the new records, and whether the cards held anything not known before this run:
+    for multi-category sites an article another category already listed in this run still
+    counts, and just gets this site's category added to its `category_field`. With a
+    dedup.HeadlineIndex, articles whose headline and day another URL already has are dropped.
+    """
+    default = site.get("default", "")
+    url_field = site.get("url_field", "url")
+    category, category_field = site.get("category"), site.get("category_field")
+    news_items = []
+    progressed = False
+    for card in cards:
+        article_id = card.pop(site["id_field"], None) if site.get("id_field") else None
+        if not card.get(url_field) or card[url_field] == default:
+            continue  # Articles without a URL can't be fetched or keyed
+        card[url_field] = urljoin(site["base_url"], card[url_field])
+        if site.get("page_field"):
+            card[site["page_field"]] = page_number
+        if category_field:
+            card[category_field] = category
+        news_item = {column: card.get(column, default) for column in site["columns"]}
+        if headlines and not frontier.is_known(news_item[url_field], article_id or None):
+            duplicate_of = headlines.duplicate_of(news_item[url_field], {**card, **news_item})
+            if duplicate_of:
+                print(f"[{site['name']}] Skipping {news_item[url_field]}: same story as {duplicate_of}")
+                continue
+        if frontier.add(news_item[url_field], news_item, article_id or None):
+            news_items.append(news_item)
+            progressed = True
+        elif category_field:
+            frontier.add_tag(news_item[url_field], category_field, category)
+            progressed = progressed or frontier.listed_this_run(news_item[url_field])
+    return news_items, progressed
+
+
+def listing_sites(site):
+    """One listing pass per entry of a site's `categories`, or just the site itself."""
+    if not site.get("categories"):
+        return [site]
+    return [{**site, "name": f"{site['name']}:{category}", "start_url": url, "category": category}
+            for category, url in site["categories"].items()]
+
+
+async def list_load_more(page, site, frontier, stats, clicked=0, headlines=None):
+    """Yield the new articles on the first screen, then after each "Show More" click.
+
+    With `clicked` > 0, carry on from a page that is already open and was clicked that many times.
+    """
+    name = site["name"]
+    if not clicked and not await goto_with_retry(page, site["start_url"], stats):
+        return
+    for click in range(clicked, site["max_clicks"] + 1):
+        if click > clicked:
+            more_button = await page.query_selector(site["more_button"])
+            if not more_button:
+                print(f"[{name}] No 'Show More' button found on click {click}")
+                return
+            if not await click_and_wait_for_more(page, more_button, site["listing"]["baseSelector"], stats):
+                print(f"[{name}] No new articles after click {click}. Stopping.")
+                return
+            print(f"[{name}] Clicked 'Show More' button {click}/{site['max_clicks']}")
+
+        news_items, progressed = add_new_items(site, frontier, await extract_new_cards(page, site["listing"]),
+                                               headlines=headlines)
+        if site.get("prune_seen", True):
+            await prune_seen_cards(page)
+        frontier.checkpoint()
+        yield news_items
+        if not progressed:
+            print(f"[{name}] Reached already-known articles. Stopping.")
+            return
+
+
+async def list_load_more_direct(page, site, frontier, stats, session, budget, concurrency, cache=None,
+                                headlines=None):
+    """Like list_load_more, but after the first screen fetch the load-more pages straight from the
+    endpoint behind the button, several at a time over HTTP. Falls back to clicking when the
+    endpoint can't be replayed.
+    """
+    name = site["name"]
+    if not await goto_with_retry(page, site["start_url"], stats):
+        return
+    news_items, progressed = add_new_items(site, frontier, await extract_new_cards(page, site["listing"]),
+                                           headlines=headlines)
+    frontier.checkpoint()
+    yield news_items
+    if not progressed:
+        print(f"[{name}] Reached already-known articles. Stopping.")
+        return
+
+    paged_request = await discover_paged_request(page, site["more_button"])
+    if paged_request is None:
+        print(f"[{name}] Falling back to clicking 'Show More'")
+        await wait_for_network_idle(page, stats)  # Let the discovery click's cards land first
+        async for news_items in list_load_more(page, site, frontier, stats, clicked=1, headlines=headlines):
+            yield news_items
+        return
+
+    pages = iter_paged_cards(session, paged_request, site["max_clicks"], site["listing"], budget, concurrency,
+                             site.get("fragment_selector"), cache)
+    async for number, cards in pages:
+        news_items, progressed = add_new_items(site, frontier, cards, headlines=headlines)
+        frontier.checkpoint()
+        print(f"[{name}] Fetched load-more page {number} directly")
+        yield news_items
+        if not progressed:
+            print(f"[{name}] Reached already-known articles. Stopping.")
+            return
+
+
+async def list_numbered(pages, site, frontier, stats, budget, cache=None, headlines=None):
+    """Yield the new articles on each numbered listing page, resuming where an earlier run stopped.
+
+    `pages` (governor.PageRecycler) hands out the page for each navigation, so a long listing
+    doesn't keep one page and its memory for hundreds of them.
+    """
+    name = site["name"]
+    first_page = site.get("first_page", 1)
+    next_page = frontier.get_state("next_page")
+    resuming = next_page is not None
+    if resuming:
+        print(f"[{name}] Resuming from page {next_page}")
+
+    for number in range(next_page if resuming else first_page, first_page + site["max_pages"]):
+        url = site["page_url"].format(page=number)
+        print(f"[{name}] Crawling page {number}: {url}")
+        paced = None if cache and cache.serves(url, "listing") else budget
+        page = await pages.page()
+        if not await goto_with_retry(page, url, stats, wait_for=site.get("wait_for"), budget=paced):
+            continue
+
+        cards = await extract_cards(page, site["listing"])
+        if not cards:
+            print(f"[{name}] No articles found on page {number}. Stopping.")
+            break
+        news_items, progressed = add_new_items(site, frontier, cards, page_number=number, headlines=headlines)
+        frontier.checkpoint(next_page=number + 1)
+        yield news_items
+
+        if not progressed and not resuming and site.get("stop_at_known", True):
+            print(f"[{name}] Reached already-known articles at page {number}. Stopping.")
+            break
+        if site.get("next_selector") and not await page.query_selector(site["next_selector"]):
+            print(f"[{name}] No 'Next' button at page {number}. Stopping.")
+            break
+    frontier.checkpoint(next_page=None)  # Listing is done; the next run starts from the first page
+
+
+async def next_chunk(listed, size):
+    """Up to `size` queued articles: waits for the first, then takes whatever else is already listed.
+    Returns None once the listing stage is done and the queue is empty.
+    """
+    chunk = await listed.get()
+    while chunk is not None and len(chunk) < size and not listed.empty():
+        more = listed.get_nowait()
+        if more is None:
+            listed.put_nowait(None)  # Leave the end marker for the next call
+            break
+        chunk = chunk + more
+    return chunk
+
+
+async def fetch_listed(browser, site, listed, fetched, session, budget, concurrency, cache=None, blocker=None,
+                       state_dir=None):
+    """Fetch stage: fetch content for articles from the `listed` queue as they are listed, and
+    put the finished records on the `fetched` queue, then None.
+    """
+    url_field = site.get("url_field", "url")
+    extract = functools.partial(extract_article_content, selector=site["content_selector"])
+    state = state_path(state_dir, site)
+    while (news_items := await next_chunk(listed, CHECKPOINT_EVERY)) is not None:
+        urls = [news_item[url_field] for news_item in news_items]
+        async for index, content in iter_contents_http_first(
+            browser, urls, site["content_selector"], extract, batch_size=CHECKPOINT_EVERY,
+            concurrency=concurrency, headers=site.get("headers"), default=site.get("default", ""),
+            js_only=site.get("js_only", False), session=session, budget=budget, cache=cache,
+            blocker=blocker, javascript=not site.get("static", False),
+            storage_state=state if state and os.path.exists(state) else None,
+        ):
+            await fetched.put({**news_items[index], site["content_field"]: content})
+            print(f"[{site['name']}] Extracted content for {urls[index]}")
+    await fetched.put(None)
+
+
+async def write_fetched(site, fetched, frontier, search_index=None, pool=None):
+    """Write stage: checkpoint records from the `fetched` queue into the frontier as they arrive.
+
+    Every CHECKPOINT_EVERY records go through the post-processing `pool` (if any), then replace the
+    raw ones and go into `search_index`, if any. Returns the number of records written.
+    """
+    url_field = site.get("url_field", "url")
+    started = time.monotonic()
+    count = 0
+    batch = []
+    # Categories listed while a record waits here are added to the stored copy, not this one
+    tag_fields = (site["category_field"],) if site.get("category_field") else ()
+
+    async def finish(batch):
+        if pool:
+            try:
+                await postprocess_batch(pool, batch, site["content_field"])
+            except Exception as e:  # The raw records are already in the frontier
+                METRICS.failure(e)
+                print(f"[{site['name']}] Post-processing failed: {str(e)}")
+        with METRICS.time("write"):
+            for news_item in batch:
+                if pool:
+                    frontier.mark_fetched(news_item[url_field], news_item, tag_fields)
+                if search_index:
+                    search_index.add(news_item, site["name"])
+        frontier.checkpoint()
+        if search_index:
+            search_index.commit()
+
+    while (news_item := await fetched.get()) is not None:
+        with METRICS.time("write"):
+            frontier.mark_fetched(news_item[url_field], news_item, tag_fields)  # Content lives on disk only
+        if not count:
+            METRICS.observe("first_article", time.monotonic() - started)
+        METRICS.count("articles")
+        count += 1
+        batch.append(news_item)
+        if len(batch) == CHECKPOINT_EVERY:
+            await finish(batch)
+            batch = []
+    await finish(batch)
+    return count
+
+
+def output_columns(site, postprocessed=True):
+    """The site's output columns, followed by the post-processing ones when they are filled in."""
+    if not postprocessed:
+        return site["columns"]
+    return site["columns"] + [column for column in POSTPROCESS_COLUMNS if column not in site["columns"]]
+
+
+async def crawl_site(browser, site, session, budget, concurrency=DEFAULT_CONCURRENCY, cache=None, headlines=None,
+                     search_index=None, pool=None, state_dir=None, reextract=False):
+    """List, fetch and write one site. Returns the number of articles in its output.
+
+    With a `state_dir`, the listing pages' cookies and local storage are saved there for the next
+    run, and the article pages start from them. With `reextract` (offline replays), every article
+    the listing finds goes through the current selectors again, known or not, and replaces its
+    stored record.
+    """
+    name = site["name"]
+    current_site.set(name)  # Labels this site's metrics, here and in the tasks it starts
+    url_field = site.get("url_field", "url")
+    listing_stats = []  # One WaitStats per listing, as categories are listed at once
+    store = Frontier(site.get("frontier", f"{name}_frontier.sqlite3"))
+    if site["output"].endswith(".csv"):
+        store.seed_from_csv(site["output"], url_column=url_field)
+    if reextract:
+        # List into a throwaway frontier that knows nothing, so no article is skipped as known and
+        # no listing stops early; the results are folded into the site's frontier at the end
+        fd, scratch_path = tempfile.mkstemp(prefix=f"{name.replace(':', '_')}_", suffix="_frontier.sqlite3")
+        os.close(fd)
+        frontier = Frontier(scratch_path)
+        site = {**site, "stop_at_known": False}
+    else:
+        frontier = store
+
+    # Listing, fetching and writing run as a pipeline: articles are fetched as soon as they are
+    # listed, and the bounded queues hold back a stage that gets ahead of the next one
+    listed = asyncio.Queue(site.get("queue_size", QUEUE_SIZE))  # Batches of listed articles, then None
+    fetched = asyncio.Queue(CHECKPOINT_EVERY * 2)  # Records with content, then None
+    blocker = ResourceBlocker.for_site(site)
+    total = 0
+
+    async def new_listing_context():
+        context = await new_site_context(browser, site, state_dir)
+        if cache:
+            await cache.install(context, "listing")
+        await ResourceBlocker.for_site(site, listing=True).install(context)
+        return context
+
+    # The browser's memory counts towards recycling listing pages, even when it isn't our child
+    listing_browser_pid = await browser_pid(browser)
+
+    async def new_listing(listing_site, pages, stats):
+        if listing_site["pagination"] == "load_more" and listing_site.get("direct"):
+            return list_load_more_direct(await pages.page(), listing_site, frontier, stats, session, budget,
+                                         concurrency, cache, headlines)
+        if listing_site["pagination"] == "load_more":
+            return list_load_more(await pages.page(), listing_site, frontier, stats, headlines=headlines)
+        return list_numbered(pages, listing_site, frontier, stats, budget, cache, headlines)
+
+    async def run_listing(listing_site):
+        nonlocal total
+        stats = WaitStats()
+        listing_stats.append(stats)
+        pages = PageRecycler(new_listing_context, retire=lambda context: save_state(context, site, state_dir),
+                             max_navigations=site.get("recycle_after", RECYCLE_AFTER),
+                             browser_pid=listing_browser_pid)
+        # A page slot for as long as the listing page lives. Listings wait on the fetch stage when the
+        # queue is full, so they leave the last slot to it: the fetch stage can always drain the queue
+        async with PAGES.slots(reserve=1):
+            try:
+                async for new_items in await new_listing(listing_site, pages, stats):
+                    if new_items:
+                        total += len(new_items)
+                        await listed.put(new_items)
+                    print(f"[{listing_site['name']}] Total new articles: {total}")
+                await pages.close()  # Saves the cookies for the next run
+            finally:
+                stats.stop()
+                await pages.close(retire=False)
+
+    async def run_listings():
+        try:
+            # Articles listed by an interrupted run are fetched first
+            pending = frontier.pending()
+            if pending:
+                await listed.put(pending)
+            # Multi-category sites list every category at once, each in its own context
+            await asyncio.gather(*(run_listing(listing_site) for listing_site in listing_sites(site)))
+        finally:
+            await listed.put(None)
+
+    stages = [
+        asyncio.create_task(run_listings()),
+        asyncio.create_task(fetch_listed(browser, site, listed, fetched, session, budget, concurrency, cache,
+                                         blocker, state_dir)),
+        asyncio.create_task(write_fetched(site, fetched, frontier, search_index, pool)),
+    ]
+    try:
+        fetched_count = (await asyncio.gather(*stages))[2]
+    except BaseException:
+        for stage in stages:  # A failed stage would leave the others waiting on its queue
+            stage.cancel()
+        raise
+    finally:
+        if reextract:
+            scratch = list(frontier.records())
+            frontier.close()
+            os.remove(scratch_path)
+    if listing_stats:
+        WaitStats.report_all(listing_stats, name)
+    blocker.report(name)
+
+    if reextract:
+        tag_fields = (site["category_field"],) if site.get("category_field") else ()
+        for record in scratch:
+            store.add(record[url_field], record)
+            store.mark_fetched(record[url_field], record, tag_fields)
+        store.checkpoint()
+
+    # The frontier held every record as it arrived; now stream every known article to the output,
+    # so delta runs still write the full set and the output never holds a half-finished crawl
+    with open_sink(site["output"], output_columns(site, pool is not None)) as sink, METRICS.time("write"):
+        for record in store.records():
+            sink.write(record)
+    store.close()
+    if sink.count:
+        print(f"✅ [{name}] Saved {sink.count} articles ({fetched_count} {'re-extracted' if reextract else 'new'}) "
+              f"to {site['output']}")
+    else:
+        print(f"[{name}] No data found")
+    return sink.count
+
+
+async def crawl_sites(sites, concurrency=DEFAULT_CONCURRENCY, cache_dir=DEFAULT_CACHE_DIR, offline=False,
+                      headline_index=DEFAULT_HEADLINE_INDEX, search_path=DEFAULT_SEARCH_INDEX,
+                      metrics_dir=None, metrics_port=None, host_delay=DEFAULT_HOST_DELAY,
+                      postprocess_workers=POSTPROCESS_WORKERS, browser_endpoint=DEFAULT_ENDPOINT,
+                      state_dir=DEFAULT_STATE_DIR):
+    """Crawl several sites at once over one browser and one HTTP connection pool.
+
+    Responses go through an on-disk cache in `cache_dir` (None turns it off); `offline` replays
+    the cache without touching the network and re-extracts every cached article, known or not,
+    e.g. to rerun changed extractors. Stories already
+    listed under another URL in `headline_index` (None turns it off) aren't fetched again. New
+    articles are added to the search index at `search_path` (None turns it off). Stage timings and
+    counters are written to `metrics_dir` at the end, and served on `metrics_port` while crawling.
+    `host_delay` is the politeness gap between two requests to the same host. Fetched articles are
+    cleaned, language-tagged and counted in `postprocess_workers` processes (0 turns it off).
+
+    With a `browser_endpoint`, the crawl uses the warm browser of a running browser_server.py
+    instead of launching its own. Each site's cookies and local storage persist in `state_dir`
+    (None turns it off).
+    """
+    budget = HostBudget(host_delay)  # Shared, so sites on the same host stay polite together
+    cache = ResponseCache(cache_dir, offline=offline) if cache_dir else None
+    headlines = HeadlineIndex(headline_index) if headline_index else None
+    search_index = SearchIndex(search_path) if search_path else None
+    metrics_server = await serve_metrics(METRICS, metrics_port) if metrics_port else None
+    pool = new_pool(postprocess_workers) if postprocess_workers else None
+    # A browser slot for the whole crawl, so the machine's scrapers don't start more than MAX_BROWSERS
+    async with BROWSERS.slots(), async_playwright() as p, new_session(HEADERS, concurrency * len(sites)) as session:
+        browser = await connect_or_launch(p, browser_endpoint)
+        try:
+            results = await asyncio.gather(
+                *(crawl_site(browser, site, session, budget, concurrency, cache, headlines, search_index, pool,
+                             state_dir, reextract=offline)
+                  for site in sites),
+                return_exceptions=True,
+            )
+        finally:
+            await browser.close()
+            if pool:
+                pool.shutdown()
+    if cache:
+        cache.report()
+        cache.close()
+    if headlines:
+        print(f"Skipped {headlines.dropped} articles another source already had")
+        headlines.close()
+    if search_index:
+        search_index.close()
+
+    for site, result in zip(sites, results):
+        if isinstance(result, Exception):
+            METRICS.failure(result, site=site["name"])
+            print(f"[{site['name']}] Crawl failed: {str(result)}")
+    if metrics_dir:
+        METRICS.write(metrics_dir)
+    if metrics_server:
+        await metrics_server.cleanup()
+    return dict(zip([site["name"] for site in sites], results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl several news sites in one process")
+    parser.add_argument("sites", nargs="*", help=f"sites to crawl, from {', '.join(SITES)} (default: {', '.join(DEFAULT_SITES)})")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="article fetches per site")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="on-disk HTTP response cache")
+    parser.add_argument("--no-cache", action="store_const", const=None, dest="cache_dir", help="don't cache responses")
+    parser.add_argument("--offline", action="store_true",
+                        help="replay cached responses only, without any network, re-extracting every cached article")
+    parser.add_argument("--no-dedupe", action="store_const", const=None, dest="headline_index",
+                        default=DEFAULT_HEADLINE_INDEX, help="fetch stories other sources already have")
+    parser.add_argument("--no-index", action="store_const", const=None, dest="search_path",
+                        default=DEFAULT_SEARCH_INDEX, help="don't add new articles to the search index")
+    parser.add_argument("--metrics-dir", default="metrics", help="where to write crawl.prom and run_summary.json")
+    parser.add_argument("--metrics-port", type=int, help="also serve Prometheus metrics on this port while crawling")
+    parser.add_argument("--postprocess-workers", type=int, default=POSTPROCESS_WORKERS,
+                        help="processes cleaning fetched articles (0 to skip post-processing)")
+    parser.add_argument("--browser", default=DEFAULT_ENDPOINT,
+                        help="connect to a running browser_server.py, e.g. http://127.0.0.1:9222")
+    parser.add_argument("--state-dir", default=DEFAULT_STATE_DIR, help="where each site's cookies are kept")
+    parser.add_argument("--no-state", action="store_const", const=None, dest="state_dir",
+                        help="start every run without saved cookies")
+    args = parser.parse_args()
+    unknown = [name for name in args.sites if name not in SITES]
+    if unknown:
+        parser.error(f"unknown sites: {', '.join(unknown)}")
+    if args.offline and not args.cache_dir:
+        parser.error("--offline needs the cache")
+    asyncio.run(crawl_sites([SITES[name] for name in args.sites or DEFAULT_SITES], args.concurrency,
+                            args.cache_dir, args.offline, args.headline_index, args.search_path,
+                            args.metrics_dir, args.metrics_port, postprocess_workers=args.postprocess_workers,
+                            browser_endpoint=args.browser, state_dir=args.state_dir))
@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+from aiohttp import web
+from bs4 import BeautifulSoup
+
+# (mean latency, jitter) in seconds added to every response
+PROFILES = {
+    "none": (0.0, 0.0),
+    "lan": (0.005, 0.002),
+    "wan": (0.08, 0.04),
+    "slow": (0.4, 0.2),
+}
+DEFAULT_PAGES = 10
+CARDS_PER_PAGE = 20
+PARAGRAPHS = 12
+IMAGE_BYTES = 150 * 1024  # What an article's hero image costs when it isn't blocked
+RECORDED_LISTING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "document.html")
+
+WORDS = ("Kenya Nairobi county government budget farmers maize drought rains court ruling election "
+         "parliament health teachers strike football league fans market prices fuel tax traders "
+         "police report minister said on Tuesday according to the statement residents").split()
+
+KBC_LOAD_MORE_JS = """
+let next = 2;
+document.querySelector("a.loadmore-trigger").addEventListener("click", async event => {
+  event.preventDefault();
+  const body = new URLSearchParams({action: "rblivep", "data[page_next]": next});
+  const response = await fetch("/kbc/wp-admin/admin-ajax.php", {method: "POST", body});
+  const data = await response.json();
+  document.querySelector("div.block-inner").insertAdjacentHTML("beforeend", data.content);
+  next += 1;
+  if (!data.content) event.target.remove();
+});
+"""
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def article_html(article_id, container):
+    """An article page: `container` holds the paragraphs the scraper reads, with an image and a
+    stylesheet around it so blocking has something to save.
+    """
+    rng = random.Random(article_id)
+    paragraphs = "".join(f"<p>{sentence(rng, rng.randint(20, 60))}</p>" for _ in range(PARAGRAPHS))
+    return (f"<html><head><title>{sentence(rng, 6)}</title><link rel='stylesheet' href='/static/site.css'></head>"
+            f"<body><img src='/static/{article_id}.jpg'>{container.format(paragraphs)}</body></html>")
+
+
+def page_articles(site, number):
+    """(article id, headline, day) for every card on listing page `number` of a fixture site."""
+    rng = random.Random(f"{site}-{number}")
+    return [(f"{site}-{number}-{i}", sentence(rng, 8), f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}")
+            for i in range(CARDS_PER_PAGE)]
+
+
+def globalvoices_listing(number, pages):
+    """A Global Voices listing page made from the cards recorded in document.html."""
+    with open(RECORDED_LISTING, encoding="utf-8") as f:
+        soup = BeautifulSoup(f.read(), "lxml")
+    loop = soup.select_one("div.gv-card-loop")
+    recorded = loop.select("div.gv-promo-card-container")
+    for card in recorded:
+        card.extract()
+    if number <= pages:
+        for i, (article_id, headline, day) in enumerate(page_articles("gv", number)):
+            card = BeautifulSoup(str(recorded[i % len(recorded)]), "lxml").select_one("div.gv-promo-card-container")
+            for link in card.select("a[href]"):
+                link["href"] = f"/globalvoices/article/{article_id}/"
+            card.select_one("h3.post-title a").string = headline
+            card.select_one("span.datestamp").string = day
+            loop.append(card)
+    return str(soup)
+
+
+def kenyans_listing(number, pages):
+    items = "".join(
+        f"<li class='news-article-list'><h2 class='news-title'><a href='/kenyans/article/{article_id}'>{headline}</a>"
+        f"</h2><time class='datetime' datetime='{day}T08:00:00Z'>{day}</time><span class='news-author'>Staff</span>"
+        f"<div class='news-teaser'>{headline}</div></li>"
+        for article_id, headline, day in (page_articles("kenyans", number) if number < pages else [])
+    )
+    pager = "<li class='pager__item--next'><a href='#'>Next</a></li>" if number < pages - 1 else ""
+    return f"<html><body><ul>{items}</ul><ul class='pager'>{pager}</ul></body></html>"
+
+
+def kbc_cards(number):
+    return "".join(
+        f"<div class='p-wrap p-grid p-grid-2' data-pid='{article_id}'>"
+        f"<div class='p-categories p-top'><a class='p-category'>Sport</a></div>"
+        f"<h2 class='entry-title'><a class='p-url' href='/kbc/article/{article_id}/'>{headline}</a></h2>"
+        f"<time class='updated' datetime='{day}T08:00:00+03:00'>{day}</time></div>"
+        for article_id, headline, day in page_articles("kbc", number)
+    )
+
+
+def build_app(pages=DEFAULT_PAGES, profile="none"):
+    """Fixture versions of the Global Voices, Kenyans.co.ke and KBC listings and articles.
+
+    Each listing has `pages` pages of CARDS_PER_PAGE articles; the KBC category page has a
+    "Show More" button backed by a paged admin-ajax endpoint, like the real site.
+    """
+    mean, jitter = PROFILES[profile]
+
+    @web.middleware
+    async def latency(request, handler):
+        if mean:
+            await asyncio.sleep(max(0.0, random.gauss(mean, jitter)))
+        return await handler(request)
+
+    def html(text):
+        return web.Response(text=text, content_type="text/html")
+
+    async def gv_listing(request):
+        return html(globalvoices_listing(int(request.match_info["number"]), pages))
+
+    async def gv_article(request):
+        return html(article_html(request.match_info["id"], "<div class='entry'>{}</div>"))
+
+    async def kenyans(request):
+        return html(kenyans_listing(int(request.query.get("page", 0)), pages))
+
+    async def kenyans_article(request):
+        return html(article_html(request.match_info["id"], "<div class='field--name-body'>{}</div>"))
+
+    async def kbc_category(request):
+        button = "<a class='loadmore-trigger' href='#'>Show More</a>" if pages > 1 else ""
+        return html(f"<html><body><div class='block-inner'>{kbc_cards(1)}</div>{button}"
+                    f"<script>{KBC_LOAD_MORE_JS}</script></body></html>")
+
+    async def kbc_load_more(request):
+        number = int((await request.post()).get("data[page_next]", 0))
+        content = kbc_cards(number) if 1 < number <= pages else ""
+        return web.Response(text=json.dumps({"content": content}), content_type="application/json")
+
+    async def kbc_article(request):
+        return html(article_html(request.match_info["id"], "<div class='entry-content rbct clearfix'>{}</div>"))
+
+    async def static(request):
+        if request.match_info["name"].endswith(".css"):
+            return web.Response(text="body { font-family: sans-serif; }", content_type="text/css")
+        return web.Response(body=b"\0" * IMAGE_BYTES, content_type="image/jpeg")
+
+    app = web.Application(middlewares=[latency])
+    app.router.add_get("/globalvoices/page/{number}/", gv_listing)
+    app.router.add_get("/globalvoices/article/{id}/", gv_article)
+    app.router.add_get("/kenyans/news", kenyans)
+    app.router.add_get("/kenyans/article/{id}", kenyans_article)
+    app.router.add_get("/kbc/category/s/", kbc_category)
+    app.router.add_post("/kbc/wp-admin/admin-ajax.php", kbc_load_more)
+    app.router.add_get("/kbc/article/{id}/", kbc_article)
+    app.router.add_get("/static/{name}", static)
+    return app
+
+
+async def start_server(port, pages=DEFAULT_PAGES, profile="none"):
+    """Start the fixture server on 127.0.0.1:`port`. Returns its runner, for cleanup()."""
+    runner = web.AppRunner(build_app(pages, profile))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the benchmark fixture sites")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=DEFAULT_PAGES)
+    parser.add_argument("--profile", choices=PROFILES, default="none")
+    args = parser.parse_args()
+    web.run_app(build_app(args.pages, args.profile), host="127.0.0.1", port=args.port)
@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import pandas as pd
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "ref")
+SEEDED = 2  # `fetched` of articles another frontier already has: known, but neither pending nor output
+
+
+def normalize_url(url):
+    """Canonical form of an article URL, used as its key in the frontier."""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not k.startswith(TRACKING_PARAMS)]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
+
+
+class Frontier:
+    """On-disk store of every article a crawl has listed or fetched, plus a resume cursor.
+
+    Articles are keyed by normalized URL, and also by a site article id (KBC's data-pid,
+    VOA's data-article-id) when one is given. Listed articles stay pending until their
+    content is fetched, so a crashed run can pick them up again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.listed = {}  # Records added by this run, by key
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                key TEXT PRIMARY KEY,
+                article_id TEXT,
+                fetched INTEGER NOT NULL DEFAULT 0,
+                record TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS articles_article_id ON articles (article_id);
+            CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def is_known(self, url, article_id=None):
+        if article_id and self.db.execute("SELECT 1 FROM articles WHERE article_id = ?", (article_id,)).fetchone():
+            return True
+        return self.db.execute("SELECT 1 FROM articles WHERE key = ?", (normalize_url(url),)).fetchone() is not None
+
+    def add(self, url, record, article_id=None):
+        """Queue a listed article. Returns False if it was already known."""
+        if not url or self.is_known(url, article_id):
+            return False
+        key = normalize_url(url)
+        self.db.execute("INSERT INTO articles (key, article_id, record) VALUES (?, ?, ?)",
+                        (key, article_id, json.dumps(record)))
+        self.listed[key] = record
+        return True
+
+    def listed_this_run(self, url):
+        return normalize_url(url) in self.listed
+
+    def add_tag(self, url, field, value):
+        """Append `value` to the comma-separated `field` of a known article, on disk and in this run's record."""
+        key = normalize_url(url)
+        row = self.db.execute("SELECT record FROM articles WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return False
+        record = json.loads(row[0])
+        tags = [tag for tag in record.get(field, "").split(",") if tag]
+        if value in tags:
+            return False
+        record[field] = ",".join(tags + [value])
+        self.db.execute("UPDATE articles SET record = ? WHERE key = ?", (json.dumps(record), key))
+        if key in self.listed:
+            self.listed[key][field] = record[field]
+        return True
+
+    def mark_fetched(self, url, record, tag_fields=()):
+        """Store the fetched `record`. Tags add_tag() gave the stored copy in the meantime are kept:
+        each of `tag_fields` is merged with the stored value, in `record` too.
+        """
+        key = normalize_url(url)
+        if tag_fields:
+            row = self.db.execute("SELECT record FROM articles WHERE key = ?", (key,)).fetchone()
+            stored = json.loads(row[0]) if row else {}
+            for field in tag_fields:
+                tags = [tag for tag in str(record.get(field) or "").split(",") if tag]
+                tags += [tag for tag in str(stored.get(field) or "").split(",") if tag and tag not in tags]
+                record[field] = ",".join(tags)
+        self.db.execute("UPDATE articles SET fetched = 1, record = ? WHERE key = ?", (json.dumps(record), key))
+
+    def pending(self):
+        """Records listed by an earlier run whose content was never fetched."""
+        rows = self.db.execute("SELECT record FROM articles WHERE fetched = 0 ORDER BY rowid")
+        return [json.loads(record) for (record,) in rows]
+
+    def records(self):
+        """Iterate over every fetched record, in the order they were first listed."""
+        for (record,) in self.db.execute("SELECT record FROM articles WHERE fetched = 1 ORDER BY rowid"):
+            yield json.loads(record)
+
+    def get_state(self, name, default=None):
+        row = self.db.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_state(self, name, value):
+        if value is None:
+            self.db.execute("DELETE FROM state WHERE name = ?", (name,))
+        else:
+            self.db.execute("INSERT OR REPLACE INTO state (name, value) VALUES (?, ?)", (name, json.dumps(value)))
+
+    def checkpoint(self, **state):
+        """Persist `state` (e.g. the last listing page done) together with everything queued so far."""
+        for name, value in state.items():
+            self.set_state(name, value)
+        self.db.commit()
+
+    def seed_from_csv(self, csv_path, url_column="url", article_id_column=None):
+        """Mark every row of an earlier CSV output as already fetched. Only runs on an empty frontier."""
+        if len(self) or not os.path.exists(csv_path):
+            return 0
+        df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+        for row in df.to_dict("records"):
+            article_id = row.get(article_id_column) if article_id_column else None
+            if self.add(row[url_column], row, article_id):
+                self.mark_fetched(row[url_column], row)
+        self.listed.clear()  # Seeded rows come from an earlier run
+        self.db.commit()
+        print(f"Seeded frontier with {len(self)} articles from {csv_path}")
+        return len(self)
+
+    def seed_from_frontier(self, path):
+        """Mark every article the frontier at `path` has fetched as known, without copying its
+        records into this one's output. Only runs on an empty frontier.
+        """
+        if len(self) or not os.path.exists(path):
+            return 0
+        self.db.execute("ATTACH DATABASE ? AS seed", (path,))
+        try:
+            self.db.execute("INSERT OR IGNORE INTO articles (key, article_id, fetched, record) "
+                            "SELECT key, article_id, ?, '{}' FROM seed.articles WHERE fetched = 1", (SEEDED,))
+            self.db.commit()
+        finally:
+            self.db.execute("DETACH DATABASE seed")
+        print(f"Seeded frontier with {len(self)} articles from {path}")
+        return len(self)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
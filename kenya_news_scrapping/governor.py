@@ -0,0 +1,178 @@
+import asyncio
+import contextlib
+import fcntl
+import os
+import tempfile
+from telemetry import METRICS
+
+try:
+    import psutil
+except ImportError:  # Fall back to reading /proc, where there is one
+    psutil = None
+
+# Machine-wide limits, shared by every scraper process through lock files in LOCK_DIR
+LOCK_DIR = os.environ.get("SCRAPER_LOCK_DIR", os.path.join(tempfile.gettempdir(), "scraper-locks"))
+MAX_BROWSERS = int(os.environ.get("SCRAPER_MAX_BROWSERS", max(2, min(8, os.cpu_count() or 2))))
+MAX_PAGES = int(os.environ.get("SCRAPER_MAX_PAGES", 16))
+POLL = 0.5  # Seconds between attempts to get a slot when all are taken
+
+RECYCLE_AFTER = 100  # Navigations before a listing page and its context are replaced
+MAX_RSS_MB = 2000  # ...or sooner, once this process and its browser use this much memory
+RSS_CHECK_EVERY = 10  # Navigations between memory checks
+
+
+def tree_rss_mb(*pids):
+    """Resident memory of processes `pids` and all their descendants, each counted once, or None where
+    it can't be read. Uses psutil when it is installed, else Linux /proc.
+    """
+    if psutil:
+        tree = set()
+        for pid in pids:
+            try:
+                process = psutil.Process(pid)
+                tree |= {process, *process.children(recursive=True)}
+            except psutil.Error:
+                pass
+        total = 0
+        for member in tree:
+            try:
+                total += member.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / 1024 / 1024
+    try:
+        entries = os.listdir("/proc")
+    except OSError:  # No /proc (e.g. macOS)
+        return None
+    parents = {}
+    for entry in entries:
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                pass
+    tree, added = set(pids), True
+    while added:
+        children = {child for child, parent in parents.items() if parent in tree} - tree
+        tree |= children
+        added = bool(children)
+    total_kb = 0
+    for member in tree:
+        try:
+            with open(f"/proc/{member}/status") as f:
+                total_kb += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+        except OSError:
+            pass
+    return total_kb / 1024
+
+
+class HostSemaphore:
+    """A counting semaphore shared by every process on the machine: `limit` lock files, each
+    flock()ed by whoever holds that slot. The kernel drops the locks of a process that dies, so a
+    crashed scraper never leaks its slots.
+    """
+
+    def __init__(self, name, limit, lock_dir=LOCK_DIR):
+        self.name = name
+        self.limit = limit
+        self.lock_dir = lock_dir
+
+    def try_acquire(self, reserve=0):
+        """A held slot's file descriptor, or None if every slot is taken. The last `reserve` slots
+        are left to callers that don't reserve any.
+        """
+        os.makedirs(self.lock_dir, exist_ok=True)
+        for slot in range(max(1, self.limit - reserve)):
+            fd = os.open(os.path.join(self.lock_dir, f"{self.name}.{slot}.lock"), os.O_CREAT | os.O_RDWR, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    async def acquire(self, reserve=0):
+        fd = self.try_acquire(reserve)
+        if fd is None:
+            print(f"Waiting for one of the {max(1, self.limit - reserve)} {self.name} slots on this machine")
+            with METRICS.time("wait"):
+                while (fd := self.try_acquire(reserve)) is None:
+                    await asyncio.sleep(POLL)
+        return fd
+
+    def release(self, fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    @contextlib.asynccontextmanager
+    async def slots(self, count=1, reserve=0):
+        """Hold one slot, waiting for it if need be, plus up to `count` - 1 more that are free right
+        away. Yields how many are held. Never waiting for the extra ones means two processes can't
+        each hold some slots while waiting for the other's. With `reserve`, the last `reserve` slots
+        are never taken, e.g. so long-lived pages can't crowd out the ones that free theirs.
+        """
+        held = [await self.acquire(reserve)]
+        while len(held) < count and (fd := self.try_acquire(reserve)) is not None:
+            held.append(fd)
+        try:
+            yield len(held)
+        finally:
+            for fd in held:
+                self.release(fd)
+
+
+BROWSERS = HostSemaphore("browsers", MAX_BROWSERS)
+PAGES = HostSemaphore("pages", MAX_PAGES)
+
+
+class PageRecycler:
+    """One long-lived page for a listing, replaced along with its context after `max_navigations`
+    navigations, or once the memory of this process tree passes `max_rss_mb`. `browser_pid` adds
+    the tree of a browser that isn't a child of this process, e.g. one reached over CDP.
+
+    `new_context()` makes a context set up the way the listing needs it; `retire(context)`, if
+    given, runs before a context is closed (e.g. to save its cookies), unless close() is told not to.
+    """
+
+    def __init__(self, new_context, retire=None, max_navigations=RECYCLE_AFTER, max_rss_mb=MAX_RSS_MB,
+                 browser_pid=None):
+        self.new_context = new_context
+        self.retire = retire
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.pids = [os.getpid()] + ([browser_pid] if browser_pid else [])
+        self.context = None
+        self.current = None
+        self.navigations = 0
+
+    def _worn_out(self):
+        if self.navigations >= self.max_navigations:
+            return True
+        if not (self.max_rss_mb and self.navigations and self.navigations % RSS_CHECK_EVERY == 0):
+            return False
+        rss = tree_rss_mb(*self.pids)
+        return rss is not None and rss > self.max_rss_mb  # Unknown memory leaves the navigation limit
+
+    async def page(self):
+        """The page to navigate next: the current one, or a fresh one if it has worn out."""
+        if self.current is None or self._worn_out():
+            if self.current is not None:
+                METRICS.count("recycled_pages")
+                print(f"Recycling the listing page after {self.navigations} navigations")
+            await self.close()
+            self.context = await self.new_context()
+            self.current = await self.context.new_page()
+            self.navigations = 0
+        self.navigations += 1
+        return self.current
+
+    async def close(self, retire=True):
+        if self.context is None:
+            return
+        try:
+            if retire and self.retire:
+                await self.retire(self.context)
+        finally:
+            await self.context.close()
+            self.context = self.current = None
@@ -0,0 +1,205 @@
+import hashlib
+import os
+import sqlite3
+import time
+from telemetry import METRICS
+
+DEFAULT_CACHE_DIR = "http_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Published articles rarely change; listing pages change every few minutes
+TTLS = {"article": 7 * 24 * 3600, "listing": 10 * 60}
+# Browser requests cached per kind. Listing pages also keep the scripts and XHRs behind their
+# load-more buttons, so an offline replay can still click them
+CACHED_TYPES = {"article": ("document",), "listing": ("document", "script", "xhr", "fetch")}
+HTML = "text/html; charset=utf-8"
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode for a response that was never cached."""
+
+
+class ResponseCache:
+    """On-disk HTTP response cache shared by the aiohttp and Chromium fetch paths.
+
+    Bodies are stored once per content hash under `root/objects`, and an SQLite index maps each
+    request to its body, validators and timestamps. A fresh entry (younger than its kind's TTL) is
+    served without any request; a stale one is revalidated with If-None-Match/If-Modified-Since.
+    Least recently used entries are evicted once the bodies exceed `max_bytes`. In `offline` mode
+    nothing touches the network: every cached entry counts as fresh and anything else is a CacheMiss.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, ttls=None, offline=False):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttls = {**TTLS, **(ttls or {})}
+        self.offline = offline
+        self.hits = self.revalidated = self.misses = 0
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, "index.sqlite3"), timeout=30)  # Shared by sharded workers
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+            CREATE TABLE IF NOT EXISTS objects (digest TEXT PRIMARY KEY, size INTEGER NOT NULL);
+        """)
+        if "content_type" not in {row[1] for row in self.db.execute("PRAGMA table_info(entries)")}:
+            self.db.execute("ALTER TABLE entries ADD COLUMN content_type TEXT")  # Caches from before scripts
+
+    @staticmethod
+    def key(url, method="GET", body=None):
+        return f"{method} {url}\n{body}" if body else f"{method} {url}"
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def lookup(self, key):
+        """(body, etag, last_modified, fetched_at, content_type) for a cached request, or None."""
+        row = self.db.execute("SELECT digest, etag, last_modified, fetched_at, content_type FROM entries "
+                              "WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        try:
+            with open(self._object_path(row[0]), "rb") as f:
+                body = f.read()
+        except FileNotFoundError:  # Evicted by another process
+            return None
+        return body, row[1], row[2], row[3], row[4]
+
+    def is_fresh(self, fetched_at, kind):
+        return self.offline or time.time() - fetched_at < self.ttls[kind]
+
+    def serves(self, url, kind="article", method="GET", body=None):
+        """Whether a request would be answered from disk, so callers can skip politeness waits."""
+        entry = self.db.execute("SELECT fetched_at FROM entries WHERE key = ?", (self.key(url, method, body),)).fetchone()
+        return self.offline or (entry is not None and self.is_fresh(entry[0], kind))
+
+    def conditional_headers(self, entry):
+        """Validators to send when revalidating a stale entry."""
+        headers = {}
+        if entry and entry[1]:
+            headers["If-None-Match"] = entry[1]
+        if entry and entry[2]:
+            headers["If-Modified-Since"] = entry[2]
+        return headers
+
+    def touch(self, key, refreshed=False):
+        now = time.time()
+        if refreshed:
+            self.db.execute("UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+        else:
+            self.db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self.db.commit()
+
+    def store(self, key, body, etag=None, last_modified=None, content_type=None):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".part", "wb") as f:
+                f.write(body)
+            os.replace(path + ".part", path)
+        now = time.time()
+        self.db.execute("INSERT OR IGNORE INTO objects (digest, size) VALUES (?, ?)", (digest, len(body)))
+        self.db.execute("INSERT OR REPLACE INTO entries (key, digest, etag, last_modified, fetched_at, accessed_at, "
+                        "content_type) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (key, digest, etag, last_modified, now, now, content_type))
+        self.db.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries, and bodies nothing points at, until under `max_bytes`."""
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, digest in self.db.execute("SELECT key, digest FROM entries ORDER BY accessed_at").fetchall():
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            if self.db.execute("SELECT 1 FROM entries WHERE digest = ?", (digest,)).fetchone():
+                continue
+            size = self.db.execute("SELECT size FROM objects WHERE digest = ?", (digest,)).fetchone()[0]
+            self.db.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+            if os.path.exists(self._object_path(digest)):
+                os.remove(self._object_path(digest))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self.db.commit()
+
+    async def fetch(self, session, url, kind="article", method="GET", body=None, headers=None):
+        """Fetch `url` with aiohttp through the cache and return the response body as text."""
+        key = self.key(url, method, body)
+        entry = self.lookup(key)
+        if entry and self.is_fresh(entry[3], kind):
+            self.hits += 1
+            self.touch(key)
+            return entry[0].decode("utf-8", errors="replace")
+        if self.offline:
+            raise CacheMiss(url)
+
+        request_headers = {**(headers or {}), **self.conditional_headers(entry)}
+        async with session.request(method, url, data=body or None, headers=request_headers) as response:
+            if response.status == 304 and entry:
+                self.revalidated += 1
+                self.touch(key, refreshed=True)
+                return entry[0].decode("utf-8", errors="replace")
+            response.raise_for_status()
+            content = await response.read()
+            METRICS.count("bytes", len(content))
+            self.misses += 1
+            self.store(key, content, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                       response.headers.get("Content-Type"))
+            return content.decode(response.get_encoding(), errors="replace")
+
+    async def install(self, context, kind="article"):
+        """Serve a Playwright context's page loads through the cache.
+
+        Only the CACHED_TYPES of `kind` are cached. Offline, every other request is aborted.
+        """
+        cached_types = CACHED_TYPES[kind]
+
+        async def handle(route):
+            request = route.request
+            if request.resource_type not in cached_types:
+                if self.offline:
+                    await route.abort()
+                else:
+                    await route.continue_()
+                return
+
+            key = self.key(request.url, request.method, request.post_data)
+            entry = self.lookup(key)
+            if entry and self.is_fresh(entry[3], kind):
+                self.hits += 1
+                self.touch(key)
+                await route.fulfill(status=200, body=entry[0], content_type=entry[4] or HTML)
+                return
+            if self.offline:
+                await route.abort()
+                return
+
+            response = await route.fetch(headers={**request.headers, **self.conditional_headers(entry)})
+            if response.status == 304 and entry:
+                self.revalidated += 1
+                self.touch(key, refreshed=True)
+                await route.fulfill(status=200, body=entry[0], content_type=entry[4] or HTML)
+                return
+            content = await response.body()
+            if response.ok:
+                self.misses += 1
+                self.store(key, content, response.headers.get("etag"), response.headers.get("last-modified"),
+                           response.headers.get("content-type"))
+            await route.fulfill(response=response, body=content)
+
+        await context.route("**/*", handle)
+
+    def report(self):
+        print(f"HTTP cache: {self.hits} hits, {self.revalidated} revalidated, {self.misses} fetched")
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
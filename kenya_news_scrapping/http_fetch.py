@@ -0,0 +1,103 @@
+import asyncio
+import aiohttp
+from bs4 import BeautifulSoup
+from content_fetch import DEFAULT_CONCURRENCY, DEFAULT_HOST_DELAY, HostBudget, fetch_contents
+from telemetry import METRICS
+
+
+def parse_text(html, selector):
+    """Join the text of every element matching `selector`, one per line, like the Playwright extractors do."""
+    soup = BeautifulSoup(html, "lxml")
+    texts = [elem.get_text().strip() for elem in soup.select(selector)]
+    return "\n".join(text for text in texts if text)
+
+
+def new_session(headers=None, concurrency=DEFAULT_CONCURRENCY):
+    """Keep-alive session sized to the fetch concurrency."""
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+    return aiohttp.ClientSession(connector=connector, headers=headers,
+                                 timeout=aiohttp.ClientTimeout(total=60))
+
+
+async def fetch_html(session, url, cache=None):
+    with METRICS.time("fetch"):
+        if cache:
+            return await cache.fetch(session, url, "article")
+        async with session.get(url) as response:
+            response.raise_for_status()
+            METRICS.count("bytes", len(await response.read()))
+            return await response.text()
+
+
+async def fetch_contents_http(session, urls, selector, concurrency=DEFAULT_CONCURRENCY,
+                              host_delay=DEFAULT_HOST_DELAY, budget=None, cache=None):
+    """Fetch and parse every url over plain HTTP; failures and empty parses come back as ""."""
+    budget = budget or HostBudget(host_delay)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [""] * len(urls)
+
+    async def worker(index, url):
+        if not url:
+            return
+        async with semaphore:
+            try:
+                if cache and cache.serves(url):
+                    html = await fetch_html(session, url, cache)
+                else:
+                    html = await budget.call(url, lambda: fetch_html(session, url, cache))
+                with METRICS.time("extract"):
+                    results[index] = parse_text(html, selector)
+            except Exception as e:
+                METRICS.failure(e)
+                print(f"HTTP fetch failed for {url}: {str(e)}")
+
+    await asyncio.gather(*(worker(i, url) for i, url in enumerate(urls)))
+    return results
+
+
+async def fetch_contents_http_first(browser, urls, selector, extract, concurrency=DEFAULT_CONCURRENCY,
+                                    host_delay=DEFAULT_HOST_DELAY, headers=None, default="", js_only=False,
+                                    session=None, budget=None, cache=None, blocker=None, javascript=True,
+                                    storage_state=None):
+    """Fetch article content over HTTP and only fall back to `extract(page, url)` in Chromium
+    for urls whose parse came back empty, or for every url when the site is `js_only`.
+
+    Results come back in the same order as `urls`; empty urls get `default`. Pass a shared
+    `session` and `budget` to reuse one connection pool and politeness budget across calls, and
+    a `cache` (http_cache.ResponseCache) to serve both paths from disk. `blocker`, `javascript` and
+    `storage_state` set up the browser fallback's context, as in content_fetch.fetch_contents.
+    """
+    budget = budget or HostBudget(host_delay)
+    results = [default] * len(urls)
+    if not js_only:
+        if session is None:
+            async with new_session(headers, concurrency) as session:
+                texts = await fetch_contents_http(session, urls, selector, concurrency, budget=budget, cache=cache)
+        else:
+            texts = await fetch_contents_http(session, urls, selector, concurrency, budget=budget, cache=cache)
+        for index, text in enumerate(texts):
+            if text:
+                results[index] = text
+        missing = [i for i, url in enumerate(urls) if url and not texts[i]]
+    else:
+        missing = [i for i, url in enumerate(urls) if url]
+
+    if missing:
+        print(f"Falling back to the browser for {len(missing)}/{len(urls)} articles")
+        fallback = await fetch_contents(browser, [urls[i] for i in missing], extract,
+                                        concurrency=concurrency, host_delay=host_delay,
+                                        headers=headers, default=default, budget=budget, cache=cache,
+                                        blocker=blocker, javascript=javascript, storage_state=storage_state)
+        for index, content in zip(missing, fallback):
+            results[index] = content
+    return results
+
+
+async def iter_contents_http_first(browser, urls, selector, extract, batch_size=50, **kwargs):
+    """Like fetch_contents_http_first, but yield `(index, content)` in order one batch at a time,
+    so callers can write each record out as soon as its batch is done.
+    """
+    for start in range(0, len(urls), batch_size):
+        contents = await fetch_contents_http_first(browser, urls[start:start + batch_size], selector, extract, **kwargs)
+        for offset, content in enumerate(contents):
+            yield start + offset, content
@@ -0,0 +1,21 @@
+import argparse
+import asyncio
+import nest_asyncio
+from engine import crawl_sites
+from sites import KBC_CATEGORIES, kbc_categories
+
+nest_asyncio.apply()
+
+async def scrape_and_save_csv(categories=KBC_CATEGORIES, max_clicks=15, concurrency=4, output="kbc_content.csv"):
+    """Crawl several KBC categories in one browser, storing each article once with all its categories."""
+    site = kbc_categories(categories, output, max_clicks)
+    return (await crawl_sites([site], concurrency))[site["name"]]
+
+# Run the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl several KBC categories in one browser session")
+    parser.add_argument("paths", nargs="*", help="category paths, e.g. s/ entertainment/ (default: all known categories)")
+    parser.add_argument("--max-clicks", type=int, default=15)
+    args = parser.parse_args()
+    categories = {path.strip("/").split("/")[-1]: f"https://www.kbc.co.ke/category/{path}" for path in args.paths}
+    asyncio.run(scrape_and_save_csv(categories or KBC_CATEGORIES, max_clicks=args.max_clicks))
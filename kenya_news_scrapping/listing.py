@@ -0,0 +1,109 @@
+# Listing cards are described with the same kind of schema dict that scrape.py/crawl.py hand to
+# crawl4ai's JsonCssExtractionStrategy, and extracted in a single page.evaluate round trip.
+#
+# Field types:
+#   "text"      - innerText of the first match of `selector`
+#   "attribute" - `attribute` of the first match of `selector`
+#   "texts"     - innerText of every match of `selector`, joined with `join` (default ",")
+# An empty `selector` targets the card itself, `ancestor` resolves the selector from
+# card.closest(ancestor) instead, and `default` is used when nothing matches (default "").
+
+import soupsieve
+from bs4 import BeautifulSoup
+from telemetry import METRICS
+
+SCRAPED_MARK = "data-scraper-seen"  # Set on cards already returned by extract_new_cards
+
+EXTRACT_CARDS_JS = """
+([selector, fields, mark]) => {
+    let cards = Array.from(document.querySelectorAll(selector));
+    if (mark) {
+        cards = cards.filter(card => !card.hasAttribute(mark));
+        cards.forEach(card => card.setAttribute(mark, ""));
+    }
+    return cards.map(card => {
+        const item = {};
+        for (const field of fields) {
+            const fallback = field.default ?? "";
+            const root = field.ancestor ? card.closest(field.ancestor) : card;
+            if (!root) {
+                item[field.name] = fallback;
+                continue;
+            }
+            if (field.type === "texts") {
+                const texts = Array.from(root.querySelectorAll(field.selector)).map(el => el.innerText);
+                item[field.name] = texts.length ? texts.join(field.join ?? ",") : fallback;
+                continue;
+            }
+            const el = field.selector ? root.querySelector(field.selector) : root;
+            if (!el) {
+                item[field.name] = fallback;
+            } else if (field.type === "attribute") {
+                item[field.name] = el.getAttribute(field.attribute) ?? fallback;
+            } else {
+                item[field.name] = el.innerText;
+            }
+        }
+        return item;
+    });
+}
+"""
+
+
+async def extract_cards(page, schema):
+    """Return every card matching the schema's baseSelector as a list of dicts."""
+    with METRICS.time("extract"):
+        return await page.evaluate(EXTRACT_CARDS_JS, [schema["baseSelector"], schema["fields"], None])
+
+
+async def extract_new_cards(page, schema):
+    """Like extract_cards, but only return cards not seen by a previous call on this page.
+
+    Seen cards are marked in the DOM, so after a "Show More" click only the appended
+    cards are serialized and the cost per click stays constant.
+    """
+    with METRICS.time("extract"):
+        return await page.evaluate(EXTRACT_CARDS_JS, [schema["baseSelector"], schema["fields"], SCRAPED_MARK])
+
+
+PRUNE_SEEN_JS = """
+mark => document.querySelectorAll(`[${mark}]`).forEach(card => card.replaceChildren())
+"""
+
+
+async def prune_seen_cards(page):
+    """Empty the cards extract_new_cards has already returned, so a page that keeps loading more
+    doesn't keep every earlier card's text and images in memory. The empty elements stay, for
+    scripts that count them.
+    """
+    await page.evaluate(PRUNE_SEEN_JS, SCRAPED_MARK)
+
+
+def extract_cards_html(html, schema, base_selector=None):
+    """Python twin of EXTRACT_CARDS_JS for HTML fetched without a browser (e.g. load-more fragments).
+
+    `base_selector` overrides the schema's, for fragments that lack the page's outer containers.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    items = []
+    for card in soup.select(base_selector or schema["baseSelector"]):
+        item = {}
+        for field in schema["fields"]:
+            fallback = field.get("default", "")
+            root = soupsieve.closest(field["ancestor"], card) if field.get("ancestor") else card
+            if root is None:
+                item[field["name"]] = fallback
+                continue
+            if field["type"] == "texts":
+                texts = [el.get_text(" ", strip=True) for el in root.select(field["selector"])]
+                item[field["name"]] = field.get("join", ",").join(texts) if texts else fallback
+                continue
+            el = root.select_one(field["selector"]) if field["selector"] else root
+            if el is None:
+                item[field["name"]] = fallback
+            elif field["type"] == "attribute":
+                item[field["name"]] = el.get(field["attribute"], fallback)
+            else:
+                item[field["name"]] = el.get_text(" ", strip=True)
+        items.append(item)
+    return items
@@ -0,0 +1,90 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from telemetry import METRICS
+
+try:
+    from langdetect import DetectorFactory, LangDetectException, detect
+    DetectorFactory.seed = 0  # Deterministic answers for short texts
+except ImportError:  # Fall back to counting stopwords
+    detect = None
+
+POSTPROCESS_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+COLUMNS = ["clean_content", "language", "word_count"]
+
+# Sentences that are page furniture rather than article text, each within its paragraph (line)
+BOILERPLATE = [re.compile(pattern, re.IGNORECASE | re.MULTILINE) for pattern in (
+    r"\b(?:read more|read also|also read|related|see also|recommended)\s*:[^.!?\n]*(?:[.!?]|$)",
+    r"\b(?:share|follow us|join us|like us) on (?:facebook|twitter|x|whatsapp|telegram|instagram|linkedin|"
+    r"tiktok|youtube)\b[^.!?\n]*(?:[.!?]|$)",
+    r"\bclick here (?:to|for)\b[^.!?\n]*(?:[.!?]|$)",
+    r"\bsubscribe to (?:our|the)\b[^.!?\n]*(?:[.!?]|$)",
+    r"\bthe post\b.+?\bappeared first on\b[^.!?\n]*(?:[.!?]|$)",
+    r"\b(?:copyright|©)\s*\d{4}\b[^.!?\n]*(?:[.!?]|$)",
+)]
+# A leading "By Jane Doe" on a line of its own, or followed by an explicit separator ("By Jane Doe | Nairobi");
+# "By Tuesday, the court..." and "By Kenya standards..." are article text
+BYLINE = re.compile(r"\A\s*(?i:by|written by)[ \t]+[A-Z][\w.'-]*(?:[ \t]+[A-Z][\w.'-]*){0,3}"
+                    r"(?:[ \t]*$|[ \t]*\||[ \t]+[-\u2013\u2014][ \t])", re.MULTILINE)
+
+STOPWORDS = {
+    "en": {"the", "and", "of", "to", "in", "is", "that", "for", "on", "with", "was", "said", "by", "are"},
+    "sw": {"na", "ya", "wa", "kwa", "za", "la", "katika", "ni", "kuwa", "hiyo", "alisema", "hii", "cha", "kwamba"},
+    "fr": {"le", "la", "les", "et", "des", "est", "une", "pour", "dans", "que", "du", "au", "sur", "qui"},
+}
+
+
+def clean_text(text):
+    """Normalize unicode and whitespace and drop boilerplate sentences and a leading byline.
+
+    Paragraphs come one per line, so a byline paragraph ends at its line; the result is one line.
+    """
+    text = BYLINE.sub("", unicodedata.normalize("NFKC", text or ""))
+    for pattern in BOILERPLATE:
+        text = pattern.sub(" ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def detect_language(text):
+    """ISO 639-1 code of `text`, or "unknown". Uses langdetect when it is installed."""
+    if not text:
+        return "unknown"
+    if detect:
+        try:
+            return detect(text)
+        except LangDetectException:
+            return "unknown"
+    words = re.findall(r"\w+", text.lower())[:500]
+    scores = {language: sum(word in stopwords for word in words) for language, stopwords in STOPWORDS.items()}
+    language, score = max(scores.items(), key=lambda item: item[1])
+    return language if score >= 3 else "unknown"
+
+
+def process_text(text):
+    clean = clean_text(text)
+    return {"clean_content": clean, "language": detect_language(clean), "word_count": len(clean.split())}
+
+
+def process_batch(texts):
+    """The post-processing columns for each text. Runs in a worker process."""
+    return [process_text(text) for text in texts]
+
+
+def new_pool(workers=POSTPROCESS_WORKERS):
+    # spawn, not fork: the crawl process has a running event loop and a browser driver
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+async def postprocess_batch(pool, records, content_field):
+    """Add COLUMNS to `records` in place, computed on `pool` so the event loop keeps crawling."""
+    start = time.monotonic()
+    texts = [record.get(content_field) or "" for record in records]
+    columns = await asyncio.get_running_loop().run_in_executor(pool, process_batch, texts)
+    for record, extra in zip(records, columns):
+        record.update(extra)
+    METRICS.observe("postprocess", time.monotonic() - start)
+    return records
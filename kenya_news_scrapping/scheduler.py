@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+import pandas as pd
+from dedup import DATE_FIELDS
+from engine import crawl_sites
+from search import read_output
+from sites import DEFAULT_SITES, SITES
+
+DAY = 86400
+DEFAULT_BUDGET = 20000  # Requests per day across every source: listing pages plus article pages
+DEFAULT_TARGET = 2 * 3600  # Freshness target: crawl every source this often when the budget allows
+MIN_INTERVAL = 15 * 60
+MAX_INTERVAL = DAY
+RATE_WINDOW = 14  # Days of past output the publishing rate is learned from
+MIN_RATE = 1 / DAY  # Assumed rate for sources with no dated output yet
+CARDS_PER_REQUEST = 20  # Articles per listing page or load-more click, unless a site sets cards_per_request
+DEPTH_MARGIN = 1.5  # List this much deeper than the expected new articles need
+CRAWL_OVERHEAD = 2  # Listing pages per crawl beyond the new articles: the first page, and rounding up
+TICK = 60
+STATE_PATH = "scheduler_state.json"
+
+
+def publishing_rate(site, now=None, window=RATE_WINDOW):
+    """Articles per second the site published over the last `window` days, from its output's dates."""
+    if not os.path.exists(site["output"]):
+        return MIN_RATE
+    df = read_output(site["output"])
+    field = next((f for f in DATE_FIELDS if f in df.columns), None)
+    if field is None:
+        return MIN_RATE
+    dates = pd.to_datetime(df[field].astype(str), utc=True, errors="coerce", format="mixed").dropna()
+    now = pd.Timestamp(now or time.time(), unit="s", tz="UTC")
+    recent = dates[(dates > now - pd.Timedelta(days=window)) & (dates <= now)]
+    return max(len(recent) / (window * DAY), MIN_RATE)
+
+
+def listing_count(site):
+    return len(site.get("categories") or ()) or 1
+
+
+def plan(sites, rates, budget=DEFAULT_BUDGET, target=DEFAULT_TARGET):
+    """Crawl interval (seconds) and listing depth (pages) per site.
+
+    Every new article costs one fetch and a share of the listing pages whatever the interval, so
+    only the CRAWL_OVERHEAD pages per listing and crawl are left to trade off. Minimizing the mean
+    staleness (rate * interval / 2, summed over sites) under that budget gives intervals
+    proportional to sqrt(listings / rate): busy sources are crawled often, quiet ones rarely.
+    Sources the budget could crawl more often than `target` are crawled every `target` instead,
+    and what that leaves over goes to the others. The depth covers the articles expected in one
+    interval.
+    """
+    def per_request(site):
+        return site.get("cards_per_request", CARDS_PER_REQUEST)
+
+    spare = budget - sum(rates[s["name"]] * DAY * (1 + DEPTH_MARGIN / per_request(s)) for s in sites)
+    floor = max(target, MIN_INTERVAL)
+    pinned = {}  # Sites crawled every `floor`, which needs less than their share of the budget
+    while True:
+        free = [s for s in sites if s["name"] not in pinned]
+        left = spare - sum(DAY / floor * CRAWL_OVERHEAD * listing_count(s) for s in sites if s["name"] in pinned)
+        if left <= 0 or not free:
+            scale = None
+        else:
+            scale = DAY * sum(math.sqrt(CRAWL_OVERHEAD * listing_count(s) * rates[s["name"]]) for s in free) / left
+        intervals = {s["name"]: scale * math.sqrt(CRAWL_OVERHEAD * listing_count(s) / rates[s["name"]])
+                     if scale else MAX_INTERVAL for s in free}
+        faster = [name for name, interval in intervals.items() if interval < floor]
+        if not faster:
+            break
+        pinned.update(dict.fromkeys(faster, floor))
+
+    schedule = {}
+    for site in sites:
+        rate, listings = rates[site["name"]], listing_count(site)
+        interval = min(pinned.get(site["name"]) or intervals[site["name"]], MAX_INTERVAL)
+        expected = rate / listings * interval * DEPTH_MARGIN
+        pages = math.ceil(expected / per_request(site)) + 1
+        schedule[site["name"]] = {"rate_per_day": round(rate * DAY, 1), "interval": round(interval),
+                                  "pages": min(pages, configured_depth(site))}
+    return schedule
+
+
+def configured_depth(site):
+    return site["max_clicks"] + 1 if site["pagination"] == "load_more" else site["max_pages"]
+
+
+def with_depth(site, pages):
+    """The site, listing only `pages` pages (or the first screen and `pages` - 1 clicks)."""
+    if site["pagination"] == "load_more":
+        return {**site, "max_clicks": max(pages - 1, 1)}
+    return {**site, "max_pages": pages}
+
+
+def daily_requests(sites, schedule):
+    total = 0
+    for site in sites:
+        entry = schedule[site["name"]]
+        total += DAY / entry["interval"] * entry["pages"] * listing_count(site) + entry["rate_per_day"]
+    return total
+
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_PATH):
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".part", path)
+
+
+def print_plan(sites, schedule, budget):
+    for site in sites:
+        entry = schedule[site["name"]]
+        print(f"{site['name']:<14} {entry['rate_per_day']:>7}/day  every {entry['interval'] / 60:>6.0f}min  "
+              f"{entry['pages']:>3} pages")
+    print(f"About {daily_requests(sites, schedule):.0f} requests/day of {budget}")
+
+
+async def run(sites, budget=DEFAULT_BUDGET, target=DEFAULT_TARGET, state_path=STATE_PATH, **crawl_options):
+    """Crawl each source whenever its interval is up, with the depth from plan(); due sources are
+    crawled together. Rates are re-learned after every crawl, and the last crawl times persist in
+    `state_path`, so a restarted daemon picks up where it left off.
+    """
+    state = load_state(state_path)
+    rates = {site["name"]: publishing_rate(site) for site in sites}
+    while True:
+        schedule = plan(sites, rates, budget, target)
+        now = time.time()
+        due = [site for site in sites if now - state.get(site["name"], 0) >= schedule[site["name"]]["interval"]]
+        if due:
+            print(f"Crawling {', '.join(site['name'] for site in due)}")
+            results = await crawl_sites([with_depth(site, schedule[site["name"]]["pages"]) for site in due],
+                                        **crawl_options)
+            for site in due:
+                if not isinstance(results[site["name"]], Exception):
+                    state[site["name"]] = now
+                rates[site["name"]] = publishing_rate(site)
+            save_state(state, state_path)
+            print_plan(sites, plan(sites, rates, budget, target), budget)
+        await asyncio.sleep(TICK)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recrawl each source as often as its publishing rate needs")
+    parser.add_argument("command", choices=("plan", "run"), help="print the schedule, or run the daemon")
+    parser.add_argument("sites", nargs="*", help=f"sites to schedule (default: {', '.join(DEFAULT_SITES)})")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET, help="requests per day across all sources")
+    parser.add_argument("--target", type=float, default=DEFAULT_TARGET / 3600,
+                        help="freshness target: crawl interval in hours when the budget allows")
+    parser.add_argument("--state", default=STATE_PATH, help="where the last crawl times are kept")
+    args = parser.parse_args()
+    unknown = [name for name in args.sites if name not in SITES]
+    if unknown:
+        parser.error(f"unknown sites: {', '.join(unknown)}")
+    selected = [SITES[name] for name in args.sites or DEFAULT_SITES]
+    if args.command == "plan":
+        print_plan(selected, plan(selected, {site["name"]: publishing_rate(site) for site in selected},
+                                  args.budget, args.target * 3600), args.budget)
+    else:
+        asyncio.run(run(selected, args.budget, args.target * 3600, args.state))
@@ -41,7 +41,7 @@ async def extract_citizen_top_stories():
     
     config = CrawlerRunConfig(
         cache_mode = CacheMode.BYPASS,
-        extBraction_strategy=extraction_strategy,
+        extraction_strategy=extraction_strategy,
     )
 
     async with AsyncWebCrawler(verbose=True) as crawler:
@@ -0,0 +1,175 @@
+import argparse
+import os
+import sqlite3
+import time
+import pandas as pd
+from dedup import DATE_FIELDS, HEADLINE_FIELDS
+from frontier import normalize_url
+
+DEFAULT_SEARCH_INDEX = "search.sqlite3"
+
+# Output columns differ per scraper; the first non-empty one of each group is indexed
+FIELDS = {
+    "headline": HEADLINE_FIELDS,
+    "tags": ("tags", "categories", "category", "Tagline"),
+    "author": ("author", "Author"),
+    "content": ("content", "Article Content", "description"),
+}
+URL_FIELDS = ("url", "URL")
+WEIGHTS = (10.0, 4.0, 2.0, 1.0)  # bm25 weight of headline, tags, author, content matches
+
+
+def first_value(record, names):
+    return next((str(record[name]) for name in names if record.get(name) and record[name] != "N/A"), "")
+
+
+def published_day(value):
+    day = pd.to_datetime(value, utc=True, errors="coerce") if value else None
+    return None if day is None or pd.isna(day) else day.strftime("%Y-%m-%d")
+
+
+class SearchIndex:
+    """On-disk full-text index of scraped articles, ranked with BM25 (SQLite FTS5).
+
+    Articles are keyed by normalized URL, so adding one again replaces it instead of indexing it twice.
+    """
+
+    def __init__(self, path=DEFAULT_SEARCH_INDEX):
+        self.db = sqlite3.connect(path, timeout=30)  # Shared by concurrent crawls
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                url TEXT NOT NULL,
+                source TEXT,
+                published_at TEXT,
+                day TEXT
+            );
+            CREATE INDEX IF NOT EXISTS docs_day ON docs (day);
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles USING fts5(
+                headline, tags, author, content, tokenize = 'porter unicode61 remove_diacritics 2'
+            );
+        """)
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def add(self, record, source=None):
+        """Index one output record. Returns False for records without a URL."""
+        url = first_value(record, URL_FIELDS)
+        if not url:
+            return False
+        key = normalize_url(url)
+        published_at = first_value(record, DATE_FIELDS)
+        row = self.db.execute("SELECT id FROM docs WHERE key = ?", (key,)).fetchone()
+        if row:
+            self.db.execute("DELETE FROM articles WHERE rowid = ?", row)
+            self.db.execute("DELETE FROM docs WHERE id = ?", row)
+        doc_id = self.db.execute("INSERT INTO docs (key, url, source, published_at, day) VALUES (?, ?, ?, ?, ?)",
+                                 (key, url, source, published_at, published_day(published_at))).lastrowid
+        self.db.execute("INSERT INTO articles (rowid, headline, tags, author, content) VALUES (?, ?, ?, ?, ?)",
+                        (doc_id, *(first_value(record, names) for names in FIELDS.values())))
+        return True
+
+    def add_many(self, records, source=None):
+        count = sum(self.add(record, source) for record in records)
+        self.commit()
+        return count
+
+    def search(self, query, since=None, until=None, sources=None, limit=20, raw=False):
+        """Best BM25 matches for every term of `query`, newest first among equal scores. With `raw`,
+        `query` is FTS5 syntax instead (e.g. 'maize OR drought', 'headline:ruto'), and a malformed one
+        raises sqlite3.OperationalError. `since`/`until` are inclusive YYYY-MM-DD bounds on the
+        publication day.
+        """
+        conditions, params = ["articles MATCH ?"], [query if raw else quote_terms(query)]
+        if since:
+            conditions.append("docs.day >= ?")
+            params.append(since)
+        if until:
+            conditions.append("docs.day <= ?")
+            params.append(until)
+        if sources:
+            conditions.append(f"docs.source IN ({', '.join('?' * len(sources))})")
+            params.extend(sources)
+        rows = self.db.execute(f"""
+            SELECT docs.url, articles.headline, docs.published_at, docs.source,
+                   bm25(articles, {', '.join(map(str, WEIGHTS))}) AS score,
+                   snippet(articles, 3, '[', ']', '…', 16)
+            FROM articles JOIN docs ON docs.id = articles.rowid
+            WHERE {' AND '.join(conditions)}
+            ORDER BY score, docs.day DESC
+            LIMIT ?
+        """, (*params, limit))
+        columns = ["url", "headline", "published_at", "source", "score", "snippet"]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def optimize(self):
+        """Merge the index segments incremental appends leave behind."""
+        self.db.execute("INSERT INTO articles (articles) VALUES ('optimize')")
+        self.commit()
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+def quote_terms(query):
+    """`query` as FTS5 phrases, one per whitespace-separated term, so punctuation ("covid-19",
+    "Ruto's", "u.s.") is matched as text instead of parsed as query syntax.
+    """
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def read_output(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if path.endswith(".jsonl"):
+        return pd.read_json(path, lines=True, dtype=False)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Full-text search over the scraped articles")
+    parser.add_argument("--index", default=DEFAULT_SEARCH_INDEX)
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_parser = commands.add_parser("add", help="index scraper outputs (.csv, .jsonl or .parquet)")
+    add_parser.add_argument("paths", nargs="+")
+    add_parser.add_argument("--source", help="source name (default: the file name)")
+    query_parser = commands.add_parser("query", help="print the best matches")
+    query_parser.add_argument("query")
+    query_parser.add_argument("--since")
+    query_parser.add_argument("--until")
+    query_parser.add_argument("--source", action="append", dest="sources")
+    query_parser.add_argument("--limit", type=int, default=20)
+    query_parser.add_argument("--raw", action="store_true",
+                              help="treat the query as FTS5 syntax (AND/OR/NOT, column:term, prefix*)")
+    commands.add_parser("optimize", help="merge index segments")
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    if args.command == "add":
+        for path in args.paths:
+            source = args.source or os.path.splitext(os.path.basename(path))[0]
+            count = index.add_many(read_output(path).to_dict("records"), source)
+            print(f"Indexed {count} articles from {path} as {source}")
+        print(f"✅ {len(index)} articles in {args.index}")
+    elif args.command == "query":
+        start = time.perf_counter()
+        try:
+            results = index.search(args.query, args.since, args.until, args.sources, args.limit, args.raw)
+        except sqlite3.OperationalError as e:
+            index.close()
+            parser.exit(2, f"Invalid query {args.query!r}: {str(e)}\n")
+        elapsed = (time.perf_counter() - start) * 1000
+        for result in results:
+            print(f"{result['score']:.2f}  {result['published_at'][:10]}  {result['source']}  {result['headline']}")
+            print(f"       {result['url']}")
+            print(f"       {result['snippet']}")
+        print(f"{len(results)} results in {elapsed:.1f}ms")
+    else:
+        index.optimize()
+    index.close()
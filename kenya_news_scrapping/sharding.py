@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from content_fetch import DEFAULT_CONCURRENCY
+from engine import crawl_sites, output_columns
+from frontier import Frontier
+from governor import MAX_BROWSERS
+from postprocess import POSTPROCESS_WORKERS
+from sinks import open_sink
+from sites import SITES
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1, MAX_BROWSERS)
+NUMBERED = ("page_param", "page_path")
+
+
+def split_pages(first_page, max_pages, shards):
+    """Split pages first_page .. first_page + max_pages - 1 into at most `shards` contiguous (first, count) ranges."""
+    shards = max(1, min(shards, max_pages))
+    size, extra = divmod(max_pages, shards)
+    ranges = []
+    for index in range(shards):
+        count = size + (index < extra)
+        ranges.append((first_page, count))
+        first_page += count
+    return ranges
+
+
+def shard_sites(site, workers):
+    """One site dict per page range, each with its own frontier and partial output. The frontiers
+    start out knowing the site's articles (see seed_shards), so shards only fetch new ones.
+
+    Shards don't stop at already-known articles: pages shift while a crawl runs, so a shard's first
+    page can repeat the end of the previous shard. The merge drops those duplicates.
+    """
+    stem = os.path.splitext(site["output"])[0]
+    return [
+        {**site, "name": f"{site['name']}#{index}", "first_page": first, "max_pages": count,
+         "stop_at_known": False, "output": f"{stem}.shard{index}.jsonl",
+         "frontier": f"{site['name']}.shard{index}_frontier.sqlite3"}
+        for index, (first, count) in enumerate(split_pages(site.get("first_page", 1), site["max_pages"], workers))
+    ]
+
+
+def site_frontier(site):
+    """The site's own frontier, seeded from its CSV output on first use."""
+    frontier = Frontier(site.get("frontier", f"{site['name']}_frontier.sqlite3"))
+    if site["output"].endswith(".csv"):
+        frontier.seed_from_csv(site["output"], url_column=site.get("url_field", "url"))
+    return frontier
+
+
+def seed_shards(site, shards):
+    """Let each new shard frontier know every article the site's frontier has."""
+    parent = site_frontier(site)
+    parent.close()
+    for shard in shards:
+        frontier = Frontier(shard["frontier"])
+        frontier.seed_from_frontier(parent.path)
+        frontier.close()
+
+
+def crawl_shard(shard, concurrency, postprocess_workers):
+    """Runs in a worker process, with its own event loop, browser and HTTP session."""
+    return asyncio.run(crawl_sites([shard], concurrency, postprocess_workers=postprocess_workers))[shard["name"]]
+
+
+def merge_shards(site, shards):
+    """Fold the shards' partial outputs into the site's frontier in page order, then write its output.
+
+    Articles are deduplicated by URL against each other and against what earlier runs already saved.
+    """
+    url_field = site.get("url_field", "url")
+    frontier = site_frontier(site)
+    added = 0
+    for shard in shards:
+        if not os.path.exists(shard["output"]):
+            continue
+        with open(shard["output"], encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if frontier.add(record[url_field], record):
+                    frontier.mark_fetched(record[url_field], record)
+                    added += 1
+    frontier.checkpoint()
+
+    with open_sink(site["output"], output_columns(site)) as sink:
+        for record in frontier.records():
+            sink.write(record)
+    frontier.close()
+    print(f"✅ [{site['name']}] Merged {added} new articles from {len(shards)} shards; {sink.count} in {site['output']}")
+    return sink.count
+
+
+def remove_shard_files(shards):
+    for shard in shards:
+        for path in (shard["output"], shard["frontier"]):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def crawl_sharded(site, workers=DEFAULT_WORKERS, concurrency=DEFAULT_CONCURRENCY,
+                  postprocess_workers=POSTPROCESS_WORKERS):
+    """Crawl a numbered site's page range as `workers` shards, up to MAX_BROWSERS processes at once,
+    and merge their outputs.
+
+    Each worker has its own per-host rate limiter, so the site sees up to `workers` times the request
+    rate of a single process. A shard that fails keeps its frontier and partial output, and the
+    next sharded run over the same range resumes it. The `postprocess_workers` processes are split
+    between the shards running at once.
+    """
+    if site["pagination"] not in NUMBERED:
+        raise ValueError(f"{site['name']} uses {site['pagination']} pagination; only numbered pages can be sharded")
+    shards = shard_sites(site, workers)
+    seed_shards(site, shards)
+    for shard in shards:
+        print(f"[{shard['name']}] Pages {shard['first_page']}-{shard['first_page'] + shard['max_pages'] - 1}")
+
+    failed = []
+    # Each worker holds a browser slot for its whole shard, so more workers than slots would only wait
+    running = min(len(shards), MAX_BROWSERS)
+    shard_postprocess = max(1, postprocess_workers // running) if postprocess_workers else 0
+    # spawn, not fork: callers may already be inside a running event loop
+    with ProcessPoolExecutor(running, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(crawl_shard, shard, concurrency, shard_postprocess) for shard in shards]
+        for shard, future in zip(shards, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = e
+            if isinstance(result, Exception):
+                print(f"[{shard['name']}] Shard failed: {str(result)}")
+                failed.append(shard)
+
+    count = merge_shards(site, shards)
+    if failed:
+        print(f"[{site['name']}] {len(failed)} shards failed; rerun to resume them")
+    else:
+        remove_shard_files(shards)
+    return count
+
+
+if __name__ == "__main__":
+    numbered = [name for name, site in SITES.items() if site["pagination"] in NUMBERED]
+    parser = argparse.ArgumentParser(description="Crawl a numbered-page site in several processes at once")
+    parser.add_argument("site", choices=numbered)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="worker processes (page-range shards)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="article fetches per worker")
+    parser.add_argument("--postprocess-workers", type=int, default=POSTPROCESS_WORKERS,
+                        help="post-processing processes, split between the workers (0 turns it off)")
+    parser.add_argument("--first-page", type=int, help="first listing page (default: the site's)")
+    parser.add_argument("--max-pages", type=int, help="pages to crawl (default: the site's)")
+    args = parser.parse_args()
+    site = dict(SITES[args.site])
+    if args.first_page is not None:
+        site["first_page"] = args.first_page
+    if args.max_pages is not None:
+        site["max_pages"] = args.max_pages
+    crawl_sharded(site, args.workers, args.concurrency, args.postprocess_workers)
@@ -0,0 +1,166 @@
+import csv
+import json
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = None
+    pq = None
+
+FSYNC_EVERY = 100  # Records written between fsyncs
+
+
+class RecordSink:
+    """Append records to `path` one at a time instead of building one DataFrame at the end.
+
+    Records go to `path + ".part"`, which is flushed and fsynced every `fsync_every` records.
+    Closing the sink renames it onto `path`, so readers never see a half-written file. A sink
+    that received no records, or whose writing failed, leaves nothing behind.
+
+    The crawlers don't write here as articles arrive: the frontier is their incremental store,
+    committed every few dozen articles, and a sink writes the finished output from it in one pass
+    at the end. Records can still change after they are fetched (another category listing the
+    same article), which a row already in the output file couldn't follow.
+    """
+
+    def __init__(self, path, columns=None, fsync_every=FSYNC_EVERY):
+        self.path = path
+        self.part_path = path + ".part"
+        self.columns = columns
+        self.fsync_every = fsync_every
+        self.count = 0
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, record):
+        if self.file is None:
+            self.columns = self.columns or list(record)
+            self.file = self._open()
+        self._write(record)
+        self.count += 1
+        if self.count % self.fsync_every == 0:
+            self._sync()
+
+    def close(self):
+        if self.file is None:
+            return
+        try:
+            self._finish()
+            self._sync()
+        except BaseException:
+            self.abort()
+            raise
+        self.file.close()
+        self.file = None
+        os.replace(self.part_path, self.path)
+
+    def abort(self):
+        """Drop the half-written `.part` file, keeping whatever `path` held before."""
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _finish(self):
+        pass
+
+
+class CsvSink(RecordSink):
+    """Same columns and encoding as the DataFrame.to_csv(index=False) calls it replaces."""
+
+    def _open(self):
+        file = open(self.part_path, "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(file, fieldnames=self.columns, extrasaction="ignore", lineterminator="\n")
+        self.writer.writeheader()
+        return file
+
+    def _write(self, record):
+        self.writer.writerow(record)
+
+
+class JsonLinesSink(RecordSink):
+    def _open(self):
+        return open(self.part_path, "w", encoding="utf-8")
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class ParquetSink(RecordSink):
+    """Buffers `row_group_size` records at a time and writes each batch as one row group.
+
+    Every column is a string column, as in the CSV outputs, so a column that happens to be empty
+    in the first row group doesn't fix its type for the rest of the file.
+    """
+
+    def __init__(self, path, columns=None, fsync_every=FSYNC_EVERY, row_group_size=1000):
+        if pq is None:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+        super().__init__(path, columns, fsync_every=max(fsync_every, row_group_size))
+        self.row_group_size = row_group_size
+        self.rows = []
+        self.writer = None
+
+    def _open(self):
+        self.schema = pa.schema([(column, pa.string()) for column in self.columns])
+        return open(self.part_path, "wb")
+
+    def _write(self, record):
+        self.rows.append({column: None if record.get(column) is None else str(record[column])
+                          for column in self.columns})
+        if len(self.rows) >= self.row_group_size:
+            self._flush_rows()
+
+    def _flush_rows(self):
+        if not self.rows:
+            return
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.file, self.schema, compression="zstd")
+        self.writer.write_table(pa.Table.from_pylist(self.rows, schema=self.schema))
+        self.rows = []
+
+    def _finish(self):
+        self._flush_rows()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def abort(self):
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except Exception:  # The file is being thrown away anyway
+                pass
+            self.writer = None
+        super().abort()
+
+
+SINKS = {
+    ".csv": CsvSink,
+    ".jsonl": JsonLinesSink,
+    ".parquet": ParquetSink,
+}
+
+
+def open_sink(path, columns=None, **kwargs):
+    """Pick a sink from the file extension: .csv, .jsonl or .parquet."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SINKS:
+        raise ValueError(f"Unsupported output format {extension!r}, expected one of {', '.join(SINKS)}")
+    return SINKS[extension](path, columns, **kwargs)
@@ -0,0 +1,246 @@
+# Site definitions for engine.py. Each site is a plain dict:
+#
+#   name              - short id, also used for the frontier file and log lines
+#   pagination        - "load_more" (click `more_button` up to `max_clicks` times on `start_url`),
+#                       "page_param" or "page_path" (visit `page_url` with {page} from `first_page`
+#                       for up to `max_pages` pages, stopping early if `next_selector` is missing)
+#   direct            - load_more only: replay the paged request behind `more_button` over HTTP instead
+#                       of clicking (ajax_listing.py); `fragment_selector` overrides the listing's
+#                       baseSelector for the HTML fragments it returns
+#   stop_at_known     - page_param/page_path: stop at the first page with no new articles (default True)
+#   recycle_after     - page_param/page_path: navigations before the listing page and its context are
+#                       replaced (default governor.RECYCLE_AFTER)
+#   prune_seen        - load_more: empty cards already extracted, so the page's DOM stops growing (default True)
+#   queue_size        - listing batches that may wait for the fetch stage before listing pauses
+#                       (default engine.QUEUE_SIZE)
+#   listing           - schema for listing.extract_cards
+#   id_field          - listing field holding a site article id (dropped from the output)
+#   url_field         - output column holding the article URL, made absolute against `base_url`
+#   page_field        - output column that records the listing page number
+#   categories        - load_more only: {category: start_url} listed in parallel into one output, each
+#                       article stored once with every category it appeared in joined in `category_field`
+#   content_selector  - article body paragraphs; `content_field` is the output column they go to
+#   js_only           - skip the HTTP fetch and always render article pages in Chromium
+#   static            - article pages render without JavaScript, so the browser fallback runs with it off
+#   block_types       - resource types the browser aborts (default blocking.ARTICLE_BLOCK_TYPES for
+#                       articles, blocking.LISTING_BLOCK_TYPES for listings); `deny_domains` adds hosts
+#                       to blocking.DENY_DOMAINS and `allow_domains` lets third-party hosts through
+#   columns           - output columns, in order; `default` fills anything missing
+#   output            - where the scraper writes (.csv, .jsonl or .parquet)
+#   frontier          - frontier database path (default {name}_frontier.sqlite3)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
+}
+
+KBC_CONTENT_SELECTOR = "div.entry-content.rbct.clearfix p"
+
+KBC_CARD_FIELDS = [
+    {"name": "pid", "selector": "", "type": "attribute", "attribute": "data-pid"},
+    {"name": "headline", "selector": "h2.entry-title a.p-url", "type": "text"},
+    {"name": "url", "selector": "h2.entry-title a.p-url", "type": "attribute", "attribute": "href"},
+    {"name": "published_at", "selector": "time.updated", "type": "attribute", "attribute": "datetime"},
+    {"name": "tags", "selector": "div.p-categories.p-top a.p-category", "type": "texts"},
+]
+
+
+def kbc_category(name, path, output, max_clicks=15):
+    """A KBC category listing with the block-inner card grid and a "Show More" button."""
+    return {
+        "name": name,
+        "pagination": "load_more",
+        "start_url": f"https://www.kbc.co.ke/category/{path}",
+        "more_button": "a.loadmore-trigger",
+        "max_clicks": max_clicks,
+        "listing": {
+            "name": name,
+            "baseSelector": "div.block-inner div.p-wrap.p-grid.p-grid-2",
+            "fields": KBC_CARD_FIELDS,
+        },
+        "direct": True,
+        "fragment_selector": "div.p-wrap.p-grid.p-grid-2",  # Load-more fragments have no div.block-inner
+        "id_field": "pid",
+        "base_url": "https://www.kbc.co.ke",
+        "content_selector": KBC_CONTENT_SELECTOR,
+        "content_field": "content",
+        "columns": ["headline", "url", "published_at", "tags", "content"],
+        "output": output,
+        "headers": HEADERS,
+    }
+
+
+KBC_SPORT = kbc_category("kbc_sport", "s/", "kbc_sport_content.csv", max_clicks=60)
+KBC_ENTERTAINMENT = kbc_category("kbc_entertainment", "entertainment/", "kbc_entertainment_news_content.csv")
+KBC_LOCAL_NEWS = kbc_category("kbc_local_news", "news/local-news", "kbc_local_news_with_content.csv")
+
+KBC_CATEGORIES = {
+    "sport": "https://www.kbc.co.ke/category/s/",
+    "entertainment": "https://www.kbc.co.ke/category/entertainment/",
+    "local-news": "https://www.kbc.co.ke/category/news/local-news/",
+    "news": "https://www.kbc.co.ke/category/news/",
+}
+
+
+def kbc_categories(categories=KBC_CATEGORIES, output="kbc_content.csv", max_clicks=15):
+    """One KBC crawl over several category listings, deduplicated across categories."""
+    site = kbc_category("kbc", "", output, max_clicks)
+    site.update({
+        "categories": categories,
+        "category_field": "categories",
+        "columns": ["headline", "url", "published_at", "tags", "categories", "content"],
+    })
+    return site
+
+
+KBC = kbc_categories()
+
+KBC_NEWS = {
+    "name": "kbc_news",
+    "pagination": "load_more",
+    "start_url": "https://www.kbc.co.ke/category/news/local-news/",
+    "more_button": "a.loadmore-trigger",
+    "max_clicks": 15,
+    "listing": {
+        "name": "KBC News",
+        "baseSelector": "div.elementor-element-84706cc.e-flex.e-con-boxed.e-con.e-parent div.p-wrap",
+        "fields": [
+            {"name": "category", "ancestor": "div.elementor-element-84706cc.e-flex.e-con-boxed.e-con.e-parent",
+             "selector": "h2.heading-title a.h-link", "type": "text"},
+            {"name": "headline", "selector": "h2.entry-title a.p-url", "type": "text"},
+            {"name": "url", "selector": "h2.entry-title a.p-url", "type": "attribute", "attribute": "href"},
+            {"name": "published_at", "selector": "time.updated", "type": "attribute", "attribute": "datetime"},
+            {"name": "tags", "selector": "div.p-categories a.p-category", "type": "texts"},
+            {"name": "description", "selector": "div.p-content > p", "type": "text"},
+        ],
+    },
+    "base_url": "https://www.kbc.co.ke",
+    "content_selector": KBC_CONTENT_SELECTOR,
+    "content_field": "content",
+    "columns": ["category", "headline", "url", "published_at", "tags", "description", "content"],
+    "output": "kbc_news_with_content.csv",
+    "headers": HEADERS,
+}
+
+VOA_AFRICA = {
+    "name": "voa_africa",
+    "pagination": "load_more",
+    "start_url": "https://www.voaafrica.com/z/7605",
+    "more_button": "a.btn.link-showMore.btn__text",
+    "max_clicks": 30,
+    "listing": {
+        "name": "VOA Africa News",
+        "baseSelector": "div.news__item.news__item--unopenable.accordeon__item",
+        "fields": [
+            {"name": "article_id", "selector": "", "type": "attribute", "attribute": "data-article-id"},
+            {"name": "date", "selector": "time[pubdate='pubdate']", "type": "attribute", "attribute": "datetime"},
+            {"name": "title", "selector": "h1.title.pg-title.pg-title--immovable", "type": "text"},
+            {"name": "url", "selector": "a.js-media-title-link", "type": "attribute", "attribute": "href"},
+        ],
+    },
+    "direct": True,
+    "id_field": "article_id",
+    "base_url": "https://www.voaafrica.com",
+    "content_selector": "div.intro.m-t-md p",
+    "content_field": "description",
+    "static": True,
+    "columns": ["date", "title", "description", "url"],
+    "output": "voa_africa_news.csv",
+    "headers": HEADERS,
+}
+
+KENYANS = {
+    "name": "kenyans",
+    "pagination": "page_param",
+    "page_url": "https://www.kenyans.co.ke/news?page={page}",
+    "first_page": 0,  # page=0 is the first page
+    "max_pages": 200,
+    "next_selector": "li.pager__item--next a",
+    "listing": {
+        "name": "Kenyans.co.ke News",
+        "baseSelector": "li.news-article-list",
+        "fields": [
+            {"name": "headline", "selector": "h2.news-title a", "type": "text"},
+            {"name": "url", "selector": "h2.news-title a", "type": "attribute", "attribute": "href"},
+            {"name": "published_at", "selector": "time.datetime", "type": "attribute", "attribute": "datetime"},
+            {"name": "author", "selector": "span.news-author", "type": "text"},
+            {"name": "teaser", "selector": "div.news-teaser", "type": "text"},
+        ],
+    },
+    "base_url": "https://www.kenyans.co.ke",
+    "content_selector": "div.field--name-body p",
+    "content_field": "content",
+    "columns": ["headline", "url", "published_at", "author", "teaser", "content"],
+    "output": "kenyans_news_content.csv",
+    "headers": HEADERS,
+}
+
+GLOBAL_VOICES = {
+    "name": "globalvoices",
+    "pagination": "page_path",
+    "page_url": "https://globalvoices.org/-/world/sub-saharan-africa/kenya/page/{page}/",
+    "first_page": 1,
+    "max_pages": 70,
+    "wait_for": "div.gv-promo-card-container",
+    "listing": {
+        "name": "Global Voices Kenya",
+        "baseSelector": "div.gv-promo-card-container",
+        "fields": [
+            {"name": "Title", "selector": "h3.post-title a", "type": "text", "default": "N/A"},
+            {"name": "URL", "selector": "h3.post-title a", "type": "attribute", "attribute": "href", "default": "N/A"},
+            {"name": "Tagline", "selector": "div.postmeta.post-tagline", "type": "text", "default": "N/A"},
+            {"name": "Author", "selector": "span.credit-label + a.user-link", "type": "text", "default": "N/A"},
+            {"name": "Date", "selector": "span.datestamp", "type": "text", "default": "N/A"},
+        ],
+    },
+    "url_field": "URL",
+    "page_field": "Page",
+    "base_url": "https://globalvoices.org",
+    "content_selector": "div.entry p",
+    "content_field": "Article Content",
+    "static": True,
+    "columns": ["Page", "Title", "URL", "Tagline", "Author", "Date", "Article Content"],
+    "default": "N/A",
+    "output": "globalvoices_kenya_articles.csv",
+    "headers": HEADERS,
+}
+
+# Citizen Digital renders with Vue, so citizen.py crawls it with crawl4ai instead of engine.py:
+# `sections` are listing pages whose links matching `article_pattern` are the articles, and
+# `article` is the schema for the article page's own metadata
+CITIZEN = {
+    "name": "citizen",
+    "sections": {
+        "news": "https://www.citizen.digital/news",
+        "business": "https://www.citizen.digital/business",
+        "sports": "https://www.citizen.digital/sports",
+        "world": "https://www.citizen.digital/world",
+        "lifestyle": "https://www.citizen.digital/lifestyle",
+    },
+    "article_pattern": r"^https://www\.citizen\.digital/[\w-]+/[\w-]+-n\d+/?$",
+    "article": {
+        "name": "Citizen Digital Article",
+        "baseSelector": "html",
+        "fields": [
+            {"name": "headline", "selector": "meta[property='og:title']", "type": "attribute", "attribute": "content"},
+            {"name": "published_at", "selector": "meta[property='article:published_time']", "type": "attribute",
+             "attribute": "content"},
+            {"name": "description", "selector": "meta[property='og:description']", "type": "attribute",
+             "attribute": "content"},
+        ],
+    },
+    "base_url": "https://www.citizen.digital",
+    "content_selector": "div.article-body p, div.articlecontent p, article p",
+    "content_field": "content",
+    "columns": ["category", "headline", "url", "published_at", "description", "content"],
+    "output": "citizen_digital.csv",
+    "headers": HEADERS,
+}
+
+SITES = {site["name"]: site for site in [
+    KBC_SPORT, KBC_ENTERTAINMENT, KBC_LOCAL_NEWS, KBC_NEWS, VOA_AFRICA, KENYANS, GLOBAL_VOICES, KBC,
+]}
+
+# What engine.py crawls when no sites are named; KBC overlaps the single-category KBC sites
+DEFAULT_SITES = [name for name in SITES if name != KBC["name"]]
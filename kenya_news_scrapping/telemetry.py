@@ -0,0 +1,151 @@
+import bisect
+import contextlib
+import contextvars
+import json
+import os
+import random
+import time
+from aiohttp import web
+
+# Upper bounds, in seconds, of the stage duration histogram buckets
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+MAX_SAMPLES = 10000  # Raw observations kept per histogram for exact percentiles
+
+# The site being crawled, set by engine.crawl_site. Tasks it starts inherit it, so
+# instrumentation deep in the fetch helpers doesn't need the site passed down.
+current_site = contextvars.ContextVar("current_site", default="")
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+        self.samples = []  # Uniform reservoir sample of the observations
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = value
+
+    def percentile(self, q):
+        """The q-th quantile of the sampled observations, or None before any."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Metrics:
+    """Per-site stage timings and counters for one crawl process.
+
+    Stages: goto (browser navigation), listing (load-more pages over HTTP), fetch (article pages
+    over HTTP), wait (selector, network-idle and backoff waits), extract, postprocess (a batch's
+    round trip through the post-processing pool), write and first_article (from the start of a
+    site's crawl to its first fetched article).
+
+    Stages are histograms, so both the Prometheus export and the JSON summary can show how the time
+    splits up and how it is distributed; counters cover articles, bytes, retries and failures by
+    error class.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.histograms = {}  # (stage, site) -> Histogram
+        self.counters = {}  # (name, site, error) -> value
+
+    def observe(self, stage, seconds, site=None):
+        key = (stage, current_site.get() if site is None else site)
+        self.histograms.setdefault(key, Histogram()).observe(seconds)
+
+    @contextlib.contextmanager
+    def time(self, stage, site=None):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic() - start, site)
+
+    def count(self, name, amount=1, site=None, error=""):
+        key = (name, current_site.get() if site is None else site, error)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def failure(self, exc, site=None):
+        self.count("failures", site=site, error=type(exc).__name__)
+
+    def to_prometheus(self):
+        lines = ["# TYPE scraper_stage_seconds histogram"]
+        for (stage, site), histogram in sorted(self.histograms.items()):
+            labels = f'stage="{stage}",site="{site}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else bound
+                lines.append(f'scraper_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"scraper_stage_seconds_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"scraper_stage_seconds_count{{{labels}}} {histogram.count}")
+        for name in sorted({key[0] for key in self.counters}):
+            lines.append(f"# TYPE scraper_{name}_total counter")
+            for (counter, site, error), value in sorted(self.counters.items()):
+                if counter == name:
+                    labels = f'site="{site}"' + (f',error="{error}"' if error else "")
+                    lines.append(f"scraper_{name}_total{{{labels}}} {value}")
+        lines.append("# TYPE scraper_run_seconds gauge")
+        lines.append(f"scraper_run_seconds {time.time() - self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """JSON-ready run summary: per site stage timings, counters and articles per second."""
+        elapsed = time.time() - self.started
+        sites = {}
+        for (stage, site), histogram in self.histograms.items():
+            sites.setdefault(site, {"stages": {}, "counters": {}})["stages"][stage] = {
+                "count": histogram.count,
+                "seconds": round(histogram.total, 3),
+                "mean": round(histogram.total / histogram.count, 4),
+                "p50": histogram.percentile(0.5),
+                "p95": histogram.percentile(0.95),
+            }
+        for (name, site, error), value in self.counters.items():
+            counters = sites.setdefault(site, {"stages": {}, "counters": {}})["counters"]
+            if error:
+                counters.setdefault(name, {})[error] = value
+            else:
+                counters[name] = value
+        for stats in sites.values():
+            stats["articles_per_second"] = round(stats["counters"].get("articles", 0) / elapsed, 3) if elapsed else 0
+        return {"started": self.started, "elapsed_seconds": round(elapsed, 3), "sites": sites}
+
+    def write(self, directory):
+        """Write crawl.prom (for a Prometheus textfile collector) and run_summary.json to `directory`."""
+        os.makedirs(directory, exist_ok=True)
+        for name, text in (("crawl.prom", self.to_prometheus()),
+                           ("run_summary.json", json.dumps(self.summary(), indent=2, default=str))):
+            path = os.path.join(directory, name)
+            with open(path + ".part", "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(path + ".part", path)
+        print(f"Wrote crawl metrics to {directory}")
+
+
+async def serve_metrics(metrics, port):
+    """Serve `metrics` in Prometheus text format on http://0.0.0.0:`port`/metrics. Returns the runner."""
+    async def handle(request):
+        return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, port=port).start()
+    print(f"Serving metrics on port {port}")
+    return runner
+
+
+METRICS = Metrics()
@@ -0,0 +1,130 @@
+import asyncio
+import contextlib
+import random
+import time
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from content_fetch import RETRY_STATUSES, HostBusy
+from telemetry import METRICS
+
+COUNT_CARDS_JS = "selector => document.querySelectorAll(selector).length"
+MORE_CARDS_JS = "([selector, count]) => document.querySelectorAll(selector).length > count"
+
+
+class WaitStats:
+    """Split a crawl's wall time into time spent waiting and time spent working.
+
+    Listings that run at once each need their own: their waits overlap, so one shared WaitStats can
+    wait for longer than its wall time. report_all() adds theirs up.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stopped = None
+        self.waiting = 0.0
+
+    def stop(self):
+        self.stopped = time.monotonic()
+
+    def wall_time(self):
+        return (self.stopped or time.monotonic()) - self.started
+
+    @contextlib.asynccontextmanager
+    async def measure(self):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.waiting += time.monotonic() - start
+            METRICS.observe("wait", time.monotonic() - start)
+
+    def report(self, label="Crawl"):
+        total = self.wall_time()
+        print(f"{label}: {total:.1f}s wall time, {self.waiting:.1f}s waiting, {total - self.waiting:.1f}s working")
+
+    @staticmethod
+    def report_all(stats, label="Crawl"):
+        """Report several listings' stats as one: their wall, waiting and working times summed."""
+        if len(stats) == 1:
+            stats[0].report(label)
+            return
+        total = sum(part.wall_time() for part in stats)
+        waiting = sum(part.waiting for part in stats)
+        print(f"{label}: {total:.1f}s wall time over {len(stats)} listings, {waiting:.1f}s waiting, "
+              f"{total - waiting:.1f}s working")
+
+
+def waiting(stats):
+    return stats.measure() if stats else contextlib.nullcontext()
+
+
+async def backoff_sleep(attempt, stats=None, base=1.0, cap=30.0):
+    """Sleep for a jittered base * 2**attempt seconds, capped at `cap`."""
+    delay = min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+    async with waiting(stats):
+        await asyncio.sleep(delay)
+
+
+async def goto_with_retry(page, url, stats=None, attempts=3, wait_for=None, timeout=60000, budget=None):
+    """Navigate to `url`, optionally wait for `wait_for` to appear, and retry.
+
+    With a content_fetch.HostBudget each attempt takes a request slot on the host and the budget
+    paces the retries (honouring Retry-After); without one, retries back off exponentially.
+    Returns False when every attempt failed.
+    """
+    for attempt in range(attempts):
+        try:
+            async with budget.request(url) if budget else contextlib.nullcontext():
+                with METRICS.time("goto"):
+                    response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+                if response and response.status in RETRY_STATUSES:
+                    raise HostBusy(url, response.status, response.headers.get("retry-after"))
+            if wait_for:
+                async with waiting(stats):
+                    await page.wait_for_selector(wait_for, timeout=10000)
+            return True
+        except (PlaywrightTimeoutError, HostBusy) as e:
+            print(f"Attempt {attempt + 1} failed for {url}: {str(e)}")
+            if attempt < attempts - 1:
+                METRICS.count("retries")
+                if not budget:
+                    await backoff_sleep(attempt, stats)
+            else:
+                METRICS.failure(e)
+    print(f"Failed to load {url} after {attempts} attempts.")
+    return False
+
+
+async def wait_for_network_idle(page, stats=None, timeout=10000):
+    """Wait for in-flight requests (e.g. a load-more XHR) to settle. Returns False on timeout."""
+    try:
+        async with waiting(stats):
+            await page.wait_for_load_state("networkidle", timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+async def click_and_wait_for_more(page, button, card_selector, stats=None, timeout=10000, retries=2):
+    """Click a load-more `button` and wait until more `card_selector` cards are in the DOM.
+
+    Waits on the card count first; if that times out, waits for the load-more XHR to go
+    network-idle and then backs off exponentially for up to `retries` more checks.
+    Returns False when no new cards appeared.
+    """
+    count = await page.evaluate(COUNT_CARDS_JS, card_selector)
+    await button.click()
+    try:
+        async with waiting(stats):
+            await page.wait_for_function(MORE_CARDS_JS, arg=[card_selector, count], timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        pass
+
+    await wait_for_network_idle(page, stats, timeout)
+    for attempt in range(retries + 1):
+        if await page.evaluate(MORE_CARDS_JS, [card_selector, count]):
+            return True
+        if attempt < retries:
+            METRICS.count("retries")
+            await backoff_sleep(attempt, stats)
+    return False